@@ -1,15 +1,69 @@
 import datetime
 from typing import Optional
 
+import pytz
+
+FIELDS = ("url", "time", "origin", "title", "section", "source_id")
+# Stands in for a missing time where times are kept as integers.
+NO_TIME = -2 ** 63
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+
 
 class Article:
-    def __init__(self, url: Optional[str], time: Optional[datetime.datetime], origin: Optional[str]):
-        self.url = url
-        self.time = time
-        self.origin = origin
+    __slots__ = FIELDS
+
+    def __init__(self, url: Optional[str], time: Optional[datetime.datetime], origin: Optional[str],
+                 title: Optional[str] = None, section: Optional[str] = None, source_id: Optional[str] = None):
+        for field, value in zip(FIELDS, (url, time, origin, title, section, source_id)):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Article is immutable, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Article is immutable, cannot delete {name}")
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __reduce__(self):
+        return Article, self._values()
+
+    def replace(self, **changes) -> "Article":
+        return Article(**{field: changes.get(field, getattr(self, field)) for field in FIELDS})
+
+    def row(self) -> tuple:
+        """The fields in FIELDS order with the time in UTC, as they are stored."""
+        return (self.url, None if self.time is None else self.time.astimezone(pytz.utc), self.origin, self.title,
+                self.section, self.source_id)
 
     def empty(self) -> bool:
         return self.url is None and self.time is None and self.origin is None
 
+    def __repr__(self):
+        return (f"Article(url={self.url!r}, time={self.time!r}, origin={self.origin!r}, title={self.title!r}, "
+                f"section={self.section!r}, source_id={self.source_id!r})")
+
     def __str__(self):
         return f"Article(url={self.url}, time={self.time}, origin={self.origin})"
+
+
+def to_epoch_us(time: Optional[datetime.datetime]) -> int:
+    if time is None:
+        return NO_TIME
+    delta = time - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_epoch_us(epoch_us: int) -> Optional[datetime.datetime]:
+    if epoch_us == NO_TIME:
+        return None
+    return EPOCH + datetime.timedelta(microseconds=epoch_us)
@@ -13,3 +13,47 @@ DB_HOST = os.getenv("DB_HOST", "")
 DB_PASS = os.getenv("DB_PASS", "")
 DB_PORT = int(os.getenv("DB_PORT", 0))
 DB_NAME = os.getenv("DB_NAME", "")
+HTTP2 = os.getenv("HTTP2", "1") == "1"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+SEEN_URLS_MAX_SIZE = int(os.getenv("SEEN_URLS_MAX_SIZE", 10000))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", 2))
+POLL_JITTER = float(os.getenv("POLL_JITTER", 0.1))
+POLL_RATE_SMOOTHING = float(os.getenv("POLL_RATE_SMOOTHING", 0.3))
+POLL_INTERVALS = {
+    "cnbc": (float(os.getenv("CNBC_MIN_INTERVAL", 5)), float(os.getenv("CNBC_MAX_INTERVAL", 300))),
+    "guardian": (float(os.getenv("GUARDIAN_MIN_INTERVAL", 6)), float(os.getenv("GUARDIAN_MAX_INTERVAL", 600))),
+    "nyt": (float(os.getenv("NYT_MIN_INTERVAL", 12)), float(os.getenv("NYT_MAX_INTERVAL", 600))),
+}
+DEFAULT_POLL_INTERVAL = (float(os.getenv("MIN_POLL_INTERVAL", 10)), float(os.getenv("MAX_POLL_INTERVAL", 600)))
+PIPELINE_MAX_SIZE = int(os.getenv("PIPELINE_MAX_SIZE", 100))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 4))
+PIPELINE_PUT_TIMEOUT = float(os.getenv("PIPELINE_PUT_TIMEOUT", 30))
+# Where batches that could not be queued within PIPELINE_PUT_TIMEOUT are appended as JSON lines, empty drops them.
+PIPELINE_SPILL_PATH = os.getenv("PIPELINE_SPILL_PATH", "pipeline_spill.jsonl")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_FLUSH_SIZE = int(os.getenv("DB_FLUSH_SIZE", 50))
+DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", 1))
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "news_fetcher.sqlite3")
+PUBSUB_MAX_MESSAGES = int(os.getenv("PUBSUB_MAX_MESSAGES", 100))
+PUBSUB_MAX_BYTES = int(os.getenv("PUBSUB_MAX_BYTES", 1024 * 1024))
+PUBSUB_MAX_LATENCY = float(os.getenv("PUBSUB_MAX_LATENCY", 0.05))
+GUARDIAN_SECTIONS = [section for section in os.getenv("GUARDIAN_SECTIONS", "world").split(",") if section]
+NYT_ARCHIVE_CACHE_DIR = os.getenv("NYT_ARCHIVE_CACHE_DIR", os.path.join(".cache", "nyt_archive"))
+NYT_SECTIONS = [section for section in os.getenv("NYT_SECTIONS", "world").split(",") if section]
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "database")
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "checkpoints.json")
+MAX_CATCH_UP_HOURS = float(os.getenv("MAX_CATCH_UP_HOURS", 72))
+SOURCES_CONFIG = os.getenv("SOURCES_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources.json"))
+LISTENER_PROCESSES = int(os.getenv("LISTENER_PROCESSES", 1))
+SHARD_QUEUE_SIZE = int(os.getenv("SHARD_QUEUE_SIZE", 100))
+WORKER_RESTART_DELAY = float(os.getenv("WORKER_RESTART_DELAY", 5))
+LEASES = os.getenv("LEASES", "0") == "1"
+LEASE_TTL = float(os.getenv("LEASE_TTL", 60))
+LEASE_RENEW_INTERVAL = float(os.getenv("LEASE_RENEW_INTERVAL", 20))
@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Protocol, Tuple
+
+import ciso8601
+
+from src.listeners.timestamps import GMT
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+# A source's watermark time and the id of the newest article delivered at that time. Feeds like CNBC only give
+# publication times to the second, so articles are compared with the watermark inclusively and the id tells the
+# article already delivered from one published in the same second but indexed later.
+Checkpoint = Tuple[datetime.datetime, Optional[str]]
+
+
+class CheckpointStore(Protocol):
+    async def load_checkpoint(self, source: str) -> Optional[Checkpoint]:
+        ...
+
+    async def save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str] = None) -> None:
+        ...
+
+
+class FileCheckpointStore:
+    def __init__(self, path: str = config.CHECKPOINT_PATH):
+        self.path = path
+        self._checkpoints: Optional[Dict[str, dict]] = None
+
+    def _read(self) -> Dict[str, dict]:
+        if self._checkpoints is None:
+            self._checkpoints = {}
+            if os.path.exists(self.path):
+                with open(self.path) as file:
+                    self._checkpoints = json.load(file)
+        return self._checkpoints
+
+    async def load_checkpoint(self, source: str) -> Optional[Checkpoint]:
+        checkpoint = self._read().get(source)
+        if checkpoint is None:
+            return None
+        return ciso8601.parse_datetime(checkpoint["time"]), checkpoint.get("id")
+
+    async def save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str] = None) -> None:
+        checkpoints = self._read()
+        checkpoints[source] = {"time": time.isoformat(), "id": last_id}
+        # Written to a temporary file first so a crash mid-write never leaves a truncated checkpoint file behind.
+        with open(self.path + ".tmp", "w") as file:
+            json.dump(checkpoints, file)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class CheckpointQueue:
+    """Saves checkpoints one after another, each only once the articles it covers have been committed.
+
+    Once articles fail to commit, neither their checkpoint nor any later one is saved, so the saved checkpoint stays
+    behind them and a restart fetches them again. Call rewind once the articles are being fetched again.
+    """
+
+    def __init__(self):
+        self._last: Optional[asyncio.Future] = None
+        self.failed = False
+
+    def add(self, commits: Iterable[Awaitable], save: Callable[[], Awaitable[None]]) -> None:
+        self._last = asyncio.ensure_future(self._save(self._last, list(commits), save))
+
+    async def _save(self, previous: Optional[asyncio.Future], commits: list,
+                    save: Callable[[], Awaitable[None]]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await asyncio.gather(*commits)
+        except (Exception, asyncio.CancelledError):
+            if not self.failed:
+                logger.exception("Articles were not committed, no further checkpoints are saved")
+            self.failed = True
+            return
+        if self.failed:
+            return
+        try:
+            await save()
+        except Exception:
+            logger.exception("Exception occurred while saving a checkpoint")
+
+    async def join(self) -> None:
+        if self._last is not None:
+            await asyncio.wait([self._last])
+
+    async def rewind(self) -> None:
+        """Drops the queued checkpoints and saves new ones again."""
+        await self.join()
+        self.failed = False
+
+
+async def get_start_time(checkpoints: Optional[CheckpointStore], source: str) -> Checkpoint:
+    now = datetime.datetime.now(GMT)
+    if checkpoints is None:
+        return now, None
+    checkpoint = await checkpoints.load_checkpoint(source)
+    if checkpoint is None:
+        logger.info(f"No checkpoint for {source}. Starting from now.")
+        return now, None
+    oldest_time = now - datetime.timedelta(hours=config.MAX_CATCH_UP_HOURS)
+    if checkpoint[0] < oldest_time:
+        logger.warning(f"Checkpoint for {source} is older than {config.MAX_CATCH_UP_HOURS} hours. "
+                       f"Resuming from {oldest_time} instead.")
+        return oldest_time, None
+    logger.info(f"Resuming {source} from checkpoint {checkpoint[0]} ({checkpoint[1]}).")
+    return checkpoint
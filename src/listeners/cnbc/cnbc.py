@@ -1,71 +1,76 @@
 import datetime
-from typing import Callable, Coroutine, Optional, Any, Tuple
+import itertools
+from typing import AsyncIterator, List, Optional, Tuple
 import logging
-import pytz
-import ciso8601
-import requests
-from ratelimit import limits, RateLimitException
 
-from src.listeners.cnbc.exceptions import CNBCException
 from src.article import Article
-from src.listeners.helpers import get_header_with_random_user_agent, sleep_and_retry, get_async
+from src.listeners.registry import register
+from src.listeners.source import Source
 import src.config as config
 
 logger = logging.getLogger(__name__)
 logger.setLevel(config.LOGGING_LEVEL)
 
 
-def get_listener(callback: Callable[[Article], None], *args, **kwargs) -> Callable[[Any], Coroutine]:
-    logger.info("Getting Listener.")
-    cnbc = CNBC(callback, *args, **kwargs)
-    return cnbc.listen_to_cnbc
+@register("cnbc")
+class CNBC(Source):
+    default_rate_limit = (120, 60, 10)
+    timestamp_field = "pubdateunix"
 
-
-class CNBC:
-    def __init__(self, callback: Callable[[Article], None], _=None):
-        self.callback = callback
+    def __init__(self, query: str = "Politics", **kwargs):
+        super().__init__(**kwargs)
         self.base_url = ("https://api.queryly.com/cnbc/json.aspx"
-                         "?queryly_key=31a35d40a9a64ab3&query=Politics&endindex={}&batchsize=100&sort=date")
+                         f"?queryly_key=31a35d40a9a64ab3&query={query}&endindex={{}}&batchsize=100&sort=date")
 
-    async def listen_to_cnbc(self) -> None:
-        article = Article(None, None, None)
-        newest_time = datetime.datetime.utcnow().replace(tzinfo=pytz.timezone("GMT"))
-        logger.info(f"Starting to listen to new CNBC articles. From {newest_time}...")
-        while True:
-            try:
-                result = await self.get_new_cnbc(newest_time)
-                if result is not None:
-                    logger.info("Found new cnbc article.")
-                    newest_time, article = result
-            except CNBCException:
-                logger.exception("Exception occurred while trying to scrape CNBC")
-            if not article.empty():
-                logger.info("Calling callback with new cnbc article.")
-                self.callback(article)
+    async def fetch_page(self, page: int, watermark: datetime.datetime) -> dict:
+        return await self.request_json(self.base_url.format(page * 100))
 
-    async def get_new_cnbc(self, newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        n_pages = await self._get_number_of_pages()
-        logger.info(f"Number of pages: {n_pages}")
-        results = await self._find_page_with_newest_article_after_time(newest_time, n_pages)
-        logger.info("Got results from page containing the newest article.")
-        return self._get_most_recent_article(results, newest_time)
+    def parse_items(self, data: dict) -> list:
+        return data["results"]
 
-    async def _get_number_of_pages(self) -> int:
-        json = (await request_cnbc_api(self.base_url.format(0))).json()
-        return json["metadata"]["totalpage"]
+    async def poll_batches(self, watermark: datetime.datetime
+                           ) -> AsyncIterator[Optional[Tuple[datetime.datetime, List[Article]]]]:
+        pages = await self._walk_newest_first(watermark)
+        if len(pages) > 1:
+            logger.info(f"Caught up on {len(pages)} CNBC pages.")
+        # Pages are delivered oldest first, so the checkpoint follows the catch-up page by page. Articles pushed onto
+        # a later page while walking show up twice and are only delivered once.
+        newest_time = watermark
+        seen_urls = set()
+        for items in reversed(pages):
+            items = [item for item in items if item["url"] not in seen_urls]
+            seen_urls.update(item["url"] for item in items)
+            result = self.new_articles(items, watermark)
+            if result is not None:
+                newest_time = max(newest_time, result[0])
+                yield newest_time, result[1]
 
-    async def _find_page_with_newest_article_after_time(self, newest_time: datetime.datetime, n_pages: int) -> list:
-        results = []
-        for page in range(0, n_pages, 1):
-            to_request_url = self.base_url.format(page * 100)
-            json = (await request_cnbc_api(to_request_url)).json()
-            results = json["results"]
-            if results:
-                t = datetime.datetime.fromtimestamp(results[-1]["pubdateunix"], tz=pytz.timezone("GMT"))
-                if t < newest_time:
+    async def _walk_newest_first(self, watermark: datetime.datetime) -> List[list]:
+        # One page at a time, newest first, every page is fetched after the one before it. Articles published
+        # meanwhile then only push older ones onto pages still to come, where they show up twice instead of never.
+        walk = self.fetch_pages(itertools.count(), watermark, window=1)
+        pages = []
+        try:
+            async for page, data in walk:
+                pages.append(self.parse_items(data))
+                if not self._is_past_watermark(pages[-1], watermark) or self.is_last_page(data, page):
                     break
-        results = results[::-1]
-        return results
+        finally:
+            await walk.aclose()
+        return pages
+
+    def page_count(self, data: dict) -> int:
+        return data["metadata"]["totalpage"]
+
+    def is_last_page(self, data: dict, page: int) -> bool:
+        # Results are sorted by date, so page 0 alone decides whether anything is new. The page count is only
+        # needed when the known articles are further back, and page 0 already carries it in its metadata.
+        return page + 1 >= data["metadata"]["totalpage"]
+
+    def to_article(self, item: dict, time: datetime.datetime) -> Optional[Article]:
+        if not self._check_if_article_valid(item):
+            return None
+        return Article(url=item["url"], time=time, origin="c", title=item.get("cn:title"))
 
     @staticmethod
     def _check_if_article_valid(result: dict) -> bool:
@@ -79,32 +84,3 @@ class CNBC:
                 if result["cn:type"] not in ["cnbcvideo", "live_story"]:
                     return True
         return False
-
-    def _get_most_recent_article(self, articles: list,
-                                 newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        for result in articles:
-            t = ciso8601.parse_datetime(result["datePublished"])
-            if newest_time < t:
-                if self._check_if_article_valid(result):
-                    article = Article(url=result["url"], time=t, origin="c")
-                    return t, article
-
-
-@sleep_and_retry
-@limits(calls=120, period=60)
-async def request_cnbc_api(url: str) -> requests.Response:
-    headers = get_header_with_random_user_agent()
-    response = await get_async(url, headers=headers)
-    if response.status_code != 200:
-        logger.error(f"CNBC API returned status code {response.status_code}. Sleeping for 60 seconds.")
-        raise RateLimitException("Rate limit exceeded.", 60)
-    return response
-
-if __name__ == "__main__":
-    result = {
-        "cn:contentClassification": "",
-        "cn:branding": "cnbc",
-        "cn:type": "article"
-    }
-    import asyncio
-    print(asyncio.run(CNBC._check_if_article_valid(result)))
@@ -1,2 +0,0 @@
-class CNBCException(Exception):
-    """Base exception class for CNBC."""
@@ -1,6 +1,24 @@
+import datetime
+import json
 import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytz
 
 from src.listeners.cnbc.cnbc import CNBC
+from src.listeners.response_cache import ResponseCache
+import src.listeners.helpers as helpers
+import src.listeners.source as source
+
+
+def make_page(pubdates: list, total_pages: int) -> MagicMock:
+    response = MagicMock()
+    response.content = json.dumps({
+        "metadata": {"totalpage": total_pages},
+        "results": [{"url": pubdate, "pubdateunix": pubdate} for pubdate in pubdates]
+    }).encode()
+    return response
 
 
 # Required Environment Variables: None
@@ -50,5 +68,157 @@ class ArticleValidationTestCase(unittest.TestCase):
         self.assertTrue(valid)
 
 
+class PaginationTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cnbc = CNBC()
+        self.newest_time = datetime.datetime.fromtimestamp(1000, tz=pytz.timezone("GMT"))
+
+    async def test_quiet_poll_costs_one_request(self):
+        request = AsyncMock(return_value=make_page([1000, 900, 800], 50))
+        with patch.object(self.cnbc, "request", request):
+            results = await self.cnbc.fetch_items(self.newest_time)
+        self.assertEqual(request.await_count, 1)
+        self.assertEqual([result["url"] for result in results], [1000, 900, 800])
+
+    async def test_stops_at_first_page_with_known_article(self):
+        pages = [make_page([1300, 1200], 50), make_page([1100, 900], 50), make_page([800, 700], 50)]
+        request = AsyncMock(side_effect=pages)
+        with patch.object(self.cnbc, "request", request):
+            results = await self.cnbc.fetch_items(self.newest_time)
+        self.assertEqual(request.await_count, 2)
+        self.assertEqual([result["url"] for result in results], [1300, 1200, 1100, 900])
+
+    async def test_does_not_go_past_last_page(self):
+        request = AsyncMock(return_value=make_page([1300, 1200], 1))
+        with patch.object(self.cnbc, "request", request):
+            await self.cnbc.fetch_items(self.newest_time)
+        self.assertEqual(request.await_count, 1)
+
+
+class CatchUpTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cnbc = CNBC()
+        # 20 pages of 3 articles, one article per 10 seconds, newest first.
+        self.pages = [make_page(list(range(10000 - 30 * page, 10000 - 30 * (page + 1), -10)), 20) for page in range(20)]
+        self.fetched = []
+
+    async def fetch_page(self, page, watermark):
+        self.fetched.append(page)
+        return json.loads(self.pages[page].content)
+
+    async def poll(self, pubdate: int) -> list:
+        watermark = datetime.datetime.fromtimestamp(pubdate, tz=pytz.utc)
+        with patch.object(self.cnbc, "fetch_page", self.fetch_page), \
+                patch.object(self.cnbc, "_check_if_article_valid", return_value=True):
+            return [result async for result in self.cnbc.poll_batches(watermark)]
+
+    async def test_up_to_date_poll_costs_one_request(self):
+        results = await self.poll(9990)
+
+        self.assertEqual(self.fetched, [0])
+        # The article at the watermark comes back too, the listener drops it if it was delivered.
+        self.assertEqual([article.url for article in results[0][1]], [9990, 10000])
+
+    async def test_walks_newest_first_and_delivers_pages_oldest_first(self):
+        results = await self.poll(9665)
+
+        urls = [article.url for _, articles in results for article in articles]
+        self.assertEqual(urls, list(range(9670, 10001, 10)))
+        # Every page up to the one reaching the watermark is fetched once, one after another.
+        self.assertEqual(self.fetched, list(range(12)))
+        self.assertEqual([newest_time.timestamp() for newest_time, _ in results],
+                         [10000 - 30 * page for page in range(11, -1, -1)])
+
+    async def test_walk_fetches_one_page_at_a_time_with_concurrency(self):
+        self.cnbc = CNBC(concurrency=4)
+
+        results = await self.poll(9665)
+
+        urls = [article.url for _, articles in results for article in articles]
+        self.assertEqual(urls, list(range(9670, 10001, 10)))
+        self.assertEqual(self.fetched, list(range(12)))
+
+    async def test_articles_published_during_catch_up_do_not_hide_older_ones(self):
+        feed = list(range(10000, 9400, -10))
+
+        async def fetch_page(page, watermark):
+            self.fetched.append(page)
+            # An article is published before every request, shifting every older one onto the next page.
+            feed.insert(0, feed[0] + 10)
+            return {"metadata": {"totalpage": (len(feed) + 2) // 3},
+                    "results": [{"url": pubdate, "pubdateunix": pubdate} for pubdate in feed[page * 3:page * 3 + 3]]}
+
+        self.fetch_page = fetch_page
+        results = await self.poll(9665)
+
+        urls = [article.url for _, articles in results for article in articles]
+        self.assertEqual(len(urls), len(set(urls)))
+        self.assertEqual(sorted(urls), list(range(9670, max(urls) + 1, 10)))
+        self.assertEqual([newest_time for newest_time, _ in results],
+                         sorted(newest_time for newest_time, _ in results))
+
+    async def test_never_pages_past_last_page(self):
+        await self.poll(0)
+
+        self.assertEqual(self.fetched, list(range(20)))
+
+
+class CachedCatchUpTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cache = ResponseCache()
+        for module in (helpers, source):
+            patcher = patch.object(module, "response_cache", self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        helpers._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        self.cnbc = CNBC(key="cached", cache_ttl=60, rate_limit={"calls": 6000, "period": 60, "burst": 100})
+        # 20 pages of 100 articles, one article per 10 seconds, newest first.
+        self.feed = list(range(30000, 10000, -10))
+        self.requests = []
+
+    async def asyncTearDown(self):
+        await helpers.close_client()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        # Two articles are published while the listener is catching up.
+        if len(self.requests) == 4:
+            self.feed[:0] = [30020, 30010]
+        start = int(request.url.params["endindex"])
+        return httpx.Response(200, json={
+            "metadata": {"totalpage": (len(self.feed) + 99) // 100},
+            "results": [{"url": pubdate, "pubdateunix": pubdate} for pubdate in self.feed[start:start + 100]]})
+
+    async def test_catch_up_through_the_cache_requests_every_page_once(self):
+        watermark = datetime.datetime.fromtimestamp(25005, tz=pytz.utc)
+        with patch.object(self.cnbc, "_check_if_article_valid", return_value=True):
+            results = [result async for result in self.cnbc.poll_batches(watermark)]
+
+        urls = [article.url for _, articles in results for article in articles]
+        self.assertEqual(len(urls), len(set(urls)))
+        # Articles published after page 0 was fetched are left for the next poll, none of the older ones is skipped.
+        self.assertEqual(sorted(urls), list(range(25010, 30001, 10)))
+        self.assertEqual([int(request.url.params["endindex"]) for request in self.requests],
+                         [page * 100 for page in range(6)])
+
+
+class NewArticlesTestCase(unittest.TestCase):
+    def test_returns_every_valid_article_newer_than_watermark(self):
+        cnbc = CNBC()
+        newest_time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        valid = {"cn:branding": "cnbc", "cn:type": "article"}
+        results = [
+            {**valid, "url": "b", "pubdateunix": 1672578000},
+            {**valid, "url": "video", "pubdateunix": 1672576800, "cn:type": "cnbcvideo"},
+            {**valid, "url": "a", "pubdateunix": 1672576200},
+            {**valid, "url": "old", "pubdateunix": 1672570800},
+        ]
+
+        new_time, articles = cnbc.new_articles(results, newest_time)
+
+        self.assertEqual([article.url for article in articles], ["a", "b"])
+        self.assertEqual(new_time, datetime.datetime(2023, 1, 1, 13, tzinfo=pytz.utc))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,2 +0,0 @@
-class GuardianException(Exception):
-    """Base exception class for Guardian."""
@@ -1,95 +1,101 @@
 import datetime
-from typing import Callable, Coroutine, Optional, Any, Tuple
+from typing import Dict, Iterable, Optional, Tuple, List
 import logging
 import pytz
-import ciso8601
-import requests
-from ratelimit import limits, RateLimitException
 
-from src.listeners.guardian.exceptions import GuardianException
-from src.article import Article
-from src.listeners.helpers import get_header_with_random_user_agent, sleep_and_retry, get_async
+from src.article import Article, from_epoch_us, to_epoch_us
+from src.listeners.checkpoints import CheckpointStore, get_start_time
+from src.listeners.registry import register
+from src.listeners.source import Source, last_id_at
+from src.listeners.timestamps import parse_epochs
 import src.config as config
 
 logger = logging.getLogger(__name__)
 logger.setLevel(config.LOGGING_LEVEL)
 
 
-def get_listener(callback: Callable[[Article], None], *args, **kwargs) -> Callable[[Any], Coroutine]:
-    guardian = Guardian(callback, *args, **kwargs)
-    return guardian.listen_to_guardian
-
-
-class Guardian:
-    def __init__(self, callback: Callable[[Article], None], _=None):
-        self.callback = callback
-
-    async def listen_to_guardian(self) -> None:
-        article = Article(None, None, None)
-        newest_time = datetime.datetime.utcnow().replace(tzinfo=pytz.timezone("GMT"))
-        logger.info(f"Starting to listen to new guardian articles. From {newest_time}...")
-        while True:
-            try:
-                result = await self.get_new_guardian(newest_time)
-                if result is not None:
-                    logger.info("Found new guardian article.")
-                    newest_time, article = result
-            except GuardianException:
-                logger.exception("Exception occurred while trying to scrape Guardian")
-            if not article.empty():
-                logger.info("Calling callback with new guardian article.")
-                self.callback(article)
-
-    async def get_new_guardian(self, newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        now = datetime.datetime.now(pytz.timezone("GMT"))
-        url = self._construct_url(newest_time, now)
-        pages = await self._get_number_of_pages(url)
-        logger.info(f"Number of pages: {pages}")
-        articles = await self.__find_page_with_newest_article_after_time(url, newest_time, pages)
-        logger.info("Got results from page containing the newest article.")
-        return self._get_most_recent_article(articles, newest_time)
+@register("guardian")
+class Guardian(Source):
+    default_rate_limit = (10, 60, 1)
+    timestamp_field = "webPublicationDate"
 
-    @staticmethod
-    async def _get_number_of_pages(url: str) -> int:
-        data = (await request_guardian_api(url + "1")).json()["response"]
+    def __init__(self, sections: Optional[Iterable[str]] = None, api_key: Optional[str] = None, **kwargs):
+        super().__init__(api_key=api_key if api_key is not None else config.GUARDIAN_API_KEY, **kwargs)
+        self.sections = list(sections) if sections is not None else config.GUARDIAN_SECTIONS
+
+    async def load_watermark(self, checkpoints: Optional[CheckpointStore]
+                             ) -> Tuple[Dict[str, datetime.datetime], List[str]]:
+        watermark = {}
+        delivered = []
+        for section in self.sections:
+            watermark[section], last_id = await get_start_time(checkpoints, f"{self.key}:{section}")
+            if last_id is not None:
+                delivered.append(last_id)
+        return watermark, delivered
+
+    async def save_watermark(self, checkpoints: CheckpointStore, watermark: Dict[str, datetime.datetime],
+                             articles: List[Article]) -> None:
+        for section, newest_time in watermark.items():
+            section_articles = [article for article in articles if article.section == section]
+            await checkpoints.save_checkpoint(f"{self.key}:{section}", newest_time,
+                                              last_id_at(section_articles, newest_time))
+
+    async def poll(self, watermark: Dict[str, datetime.datetime]
+                   ) -> Optional[Tuple[Dict[str, datetime.datetime], List[Article]]]:
+        # All sections share one query starting at the oldest section watermark, so the quota cost of a poll does
+        # not grow with the number of sections. Each section is then filtered against its own watermark.
+        results = await self.fetch_items(min(watermark.values()))
+        logger.info("Got results up to the page containing the newest known article.")
+        return self._get_new_articles(results[::-1], watermark)
+
+    async def fetch_page(self, page: int, watermark: datetime.datetime) -> dict:
+        # Results are ordered newest first and start at the watermark, so a quiet poll is a single empty page and a
+        # burst only pages as far as the watermark.
+        url = self._construct_url(self.sections, watermark, page + 1)
+        return (await self.request_json(url))["response"]
+
+    def parse_items(self, data: dict) -> list:
+        return data["results"]
+
+    def page_count(self, data: dict) -> int:
         return data["pages"]
 
-    @staticmethod
-    async def __find_page_with_newest_article_after_time(url: str,
-                                                         newest_time: datetime.datetime,
-                                                         n_pages: int) -> list:
-        for page in range(1, n_pages + 1, 1):
-            data = (await request_guardian_api(url + str(page))).json()["response"]
-            t = ciso8601.parse_datetime(data["results"][-1]["webPublicationDate"])
-            if t < newest_time:
-                return data["results"][::-1]
+    def is_last_page(self, data: dict, page: int) -> bool:
+        return page + 1 >= data["pages"]
 
-    @staticmethod
-    def _get_most_recent_article(articles: list,
-                                 newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        for article in articles:
-            t = ciso8601.parse_datetime(article["webPublicationDate"])
-            if t > newest_time:
-                url = article["webUrl"]
-                return t, Article(url, t, "g")
-        return None
+    def to_article(self, item: dict, time: datetime.datetime) -> Optional[Article]:
+        return self._to_article(item, time)
 
     @staticmethod
-    def _construct_url(from_time: datetime.datetime, to_time: datetime.datetime, page: int = None) -> str:
+    def _to_article(result: dict, time: datetime.datetime) -> Article:
+        return Article(result["webUrl"], time, "g", title=result.get("webTitle"), section=result.get("sectionId"),
+                       source_id=result.get("id"))
+
+    @classmethod
+    def _get_new_articles(cls, results: list, newest_times: Dict[str, datetime.datetime]
+                          ) -> Optional[Tuple[Dict[str, datetime.datetime], List[Article]]]:
+        epochs = parse_epochs(result["webPublicationDate"] for result in results)
+        newest_epochs = {section: to_epoch_us(time) for section, time in newest_times.items()}
+        articles = []
+        newest_seen = max(epochs, default=min(newest_epochs.values()))
+        for result, epoch in zip(results, epochs):
+            section = result.get("sectionId")
+            if section in newest_epochs and epoch >= newest_epochs[section]:
+                articles.append(cls._to_article(result, from_epoch_us(epoch)))
+        # The query covered every section up to the newest result, so a quiet section moves along with it instead of
+        # pinning the start of the combined query at its old watermark.
+        updated_times = {section: newest_times[section] if epoch >= newest_seen else from_epoch_us(newest_seen)
+                         for section, epoch in newest_epochs.items()}
+        if not articles and updated_times == newest_times:
+            return None
+        return updated_times, articles
+
+    def _construct_url(self, sections: List[str], from_time: datetime.datetime, page: int = None) -> str:
         if page is None:
             page = ""
-        return f"https://content.guardianapis.com/world?api-key={config.GUARDIAN_API_KEY}" \
+        return f"https://content.guardianapis.com/search?api-key={self.api_key}" \
+               f"&section={'|'.join(sections)}" \
                f"&page-size=200" \
-               f"&from-date={from_time.strftime('%Y-%m-%d')}" \
-               f"&to-date={to_time.strftime('%Y-%m-%d')}&page={page}"
-
-
-@sleep_and_retry
-@limits(calls=10, period=60)
-async def request_guardian_api(url: str) -> requests.Response:
-    headers = get_header_with_random_user_agent()
-    response = await get_async(url, headers=headers)
-    if response.status_code != 200:
-        logger.error(f"Guardian API returned status code {response.status_code}. Sleeping for 60 seconds.")
-        raise RateLimitException("Rate limit exceeded.", 60)
-    return response
+               f"&order-by=newest" \
+               f"&use-date=published" \
+               f"&from-date={from_time.astimezone(pytz.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}&page={page}"
@@ -1,3 +1,125 @@
+import datetime
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytz
+
+from src.article import Article
+from src.listeners.guardian.guardian import Guardian
+
+
+def make_page(publication_dates: list, pages: int, section: str = "world") -> MagicMock:
+    response = MagicMock()
+    response.content = json.dumps({"response": {
+        "pages": pages,
+        "results": [{"webUrl": date, "webPublicationDate": date, "sectionId": section} for date in publication_dates]
+    }}).encode()
+    return response
+
+
 # Required environment variables: None
-def test():
-    pass
+class NewArticlesTestCase(unittest.TestCase):
+    def test_returns_every_article_newer_than_watermark(self):
+        newest_times = {"world": datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)}
+        results = [
+            {"webUrl": "old", "webPublicationDate": "2023-01-01T11:00:00Z", "sectionId": "world"},
+            {"webUrl": "a", "webPublicationDate": "2023-01-01T12:30:00Z", "sectionId": "world"},
+            {"webUrl": "b", "webPublicationDate": "2023-01-01T13:00:00Z", "sectionId": "world"},
+        ]
+
+        new_times, articles = Guardian._get_new_articles(results, newest_times)
+
+        self.assertEqual([article.url for article in articles], ["a", "b"])
+        self.assertEqual(new_times, {"world": datetime.datetime(2023, 1, 1, 13, tzinfo=pytz.utc)})
+
+    def test_returns_none_without_new_articles(self):
+        newest_times = {"world": datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)}
+        results = [{"webUrl": "old", "webPublicationDate": "2023-01-01T11:00:00Z", "sectionId": "world"}]
+
+        self.assertIsNone(Guardian._get_new_articles(results, newest_times))
+
+    def test_uses_watermark_per_section(self):
+        newest_times = {"world": datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc),
+                        "politics": datetime.datetime(2023, 1, 1, 10, tzinfo=pytz.utc)}
+        results = [
+            {"webUrl": "politics", "webPublicationDate": "2023-01-01T11:00:00Z", "sectionId": "politics"},
+            {"webUrl": "world", "webPublicationDate": "2023-01-01T11:00:00Z", "sectionId": "world"},
+        ]
+
+        new_times, articles = Guardian._get_new_articles(results, newest_times)
+
+        self.assertEqual([article.url for article in articles], ["politics"])
+        self.assertEqual(new_times["politics"], datetime.datetime(2023, 1, 1, 11, tzinfo=pytz.utc))
+        self.assertEqual(new_times["world"], newest_times["world"])
+
+    def test_quiet_section_advances_to_newest_result(self):
+        newest_times = {"world": datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc),
+                        "politics": datetime.datetime(2023, 1, 1, 8, tzinfo=pytz.utc)}
+        results = [{"webUrl": "world", "webPublicationDate": "2023-01-01T11:00:00Z", "sectionId": "world"}]
+
+        new_times, articles = Guardian._get_new_articles(results, newest_times)
+
+        self.assertEqual(articles, [])
+        self.assertEqual(new_times["politics"], datetime.datetime(2023, 1, 1, 11, tzinfo=pytz.utc))
+        self.assertEqual(new_times["world"], newest_times["world"])
+
+    def test_section_with_new_articles_advances_past_its_own_watermark(self):
+        newest_times = {"world": datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc),
+                        "politics": datetime.datetime(2023, 1, 1, 8, tzinfo=pytz.utc)}
+        results = [{"webUrl": "world", "webPublicationDate": "2023-01-01T13:00:00Z", "sectionId": "world"}]
+
+        new_times, articles = Guardian._get_new_articles(results, newest_times)
+
+        self.assertEqual([article.url for article in articles], ["world"])
+        self.assertEqual(new_times, {"world": datetime.datetime(2023, 1, 1, 13, tzinfo=pytz.utc),
+                                     "politics": datetime.datetime(2023, 1, 1, 13, tzinfo=pytz.utc)})
+
+
+class PaginationTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.guardian = Guardian(["world", "politics"])
+        self.newest_time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        self.newest_times = {"world": self.newest_time, "politics": self.newest_time}
+
+    def test_url_combines_sections_and_filters_by_exact_time(self):
+        url = self.guardian._construct_url(["world", "politics"], self.newest_time)
+
+        self.assertIn("section=world|politics", url)
+        self.assertIn("from-date=2023-01-01T12:00:00Z", url)
+        self.assertIn("order-by=newest", url)
+
+    async def test_quiet_poll_costs_one_request(self):
+        request = AsyncMock(return_value=make_page([], 0))
+        with patch.object(self.guardian, "request", request):
+            result = await self.guardian.poll(self.newest_times)
+
+        self.assertIsNone(result)
+        self.assertEqual(request.await_count, 1)
+
+    async def test_burst_pages_until_watermark(self):
+        pages = [make_page(["2023-01-01T14:00:00Z", "2023-01-01T13:00:00Z"], 3),
+                 make_page(["2023-01-01T12:30:00Z", "2023-01-01T11:30:00Z"], 3)]
+        request = AsyncMock(side_effect=pages)
+        with patch.object(self.guardian, "request", request):
+            _, articles = await self.guardian.poll(self.newest_times)
+
+        self.assertEqual(request.await_count, 2)
+        self.assertEqual(len(articles), 3)
+
+    async def test_every_section_is_checkpointed(self):
+        checkpoints = MagicMock()
+        checkpoints.save_checkpoint = AsyncMock()
+        newest = datetime.datetime(2023, 1, 1, 13, tzinfo=pytz.utc)
+
+        articles = [Article("older", newest - datetime.timedelta(hours=1), "g", section="world"),
+                    Article("newest", newest, "g", section="world")]
+
+        await self.guardian.save_watermark(checkpoints, {"world": newest, "politics": newest}, articles)
+
+        self.assertEqual({call.args for call in checkpoints.save_checkpoint.await_args_list},
+                         {("guardian:world", newest, "newest"), ("guardian:politics", newest, None)})
+
+
+if __name__ == "__main__":
+    unittest.main()
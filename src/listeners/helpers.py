@@ -1,17 +1,19 @@
 import random
-import decorator
-import asyncio
 import logging
-from ratelimit import RateLimitException
-from httpx import AsyncClient
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from httpx import AsyncClient, Limits, Response, Timeout
 import requests
 
+from src.listeners.response_cache import response_cache
 from src.listeners.user_agents import user_agents
 import src.config as config
 
 logger = logging.getLogger(__name__)
 logger.setLevel(config.LOGGING_LEVEL)
 
+_client: Optional[AsyncClient] = None
+
 
 def get_random_user_agent() -> str:
     return random.choice(user_agents)
@@ -21,21 +23,56 @@ def get_header_with_random_user_agent() -> dict:
     return {"User-Agent": get_random_user_agent()}
 
 
-@decorator.decorator
-async def sleep_and_retry(func, *args, **kwargs):
-    while True:
-        try:
-            return await func(*args, **kwargs)
-        except RateLimitException as exception:
-            logger.debug(f"Rate limit exceeded. Sleeping for {exception.period_remaining} seconds.")
-            await asyncio.sleep(exception.period_remaining)
-            logger.debug("Done sleeping. Executing request.")
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client() -> AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = config.HTTP2 and _http2_available()
+        if config.HTTP2 and not http2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed. Falling back to HTTP/1.1.")
+        limits = Limits(max_connections=config.HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY)
+        timeout = Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT)
+        _client = AsyncClient(http2=http2, limits=limits, timeout=timeout)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_async(url: str, cache_ttl: float = 0, **kwargs) -> requests.Response:
+    if not cache_ttl:
+        return await get_client().get(url, **kwargs)
+    entry = response_cache.get(url)
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.to_response()
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.validators()}
+    response = await get_client().get(url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        entry.revalidate(response, cache_ttl)
+        return entry.to_response()
+    if response.status_code == 200:
+        response_cache.put(url, response, cache_ttl)
+    return response
 
 
-async def get_async(url: str, **kwargs) -> requests.Response:
-    async with AsyncClient() as client:
-        response = await client.get(url, **kwargs)
-        return response
+@asynccontextmanager
+async def stream_async(url: str, **kwargs) -> AsyncIterator[Response]:
+    async with get_client().stream("GET", url, **kwargs) as response:
+        yield response
 
 if __name__ == "__main__":
     get_random_user_agent()
@@ -0,0 +1,46 @@
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Union
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+Decoder = Callable[[Union[bytes, str]], Any]
+
+decoders: Dict[str, Decoder] = {"json": json.loads}
+try:
+    import orjson
+    decoders["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+_decoder: Optional[Decoder] = None
+
+
+def get_decoder() -> Decoder:
+    global _decoder
+    if _decoder is None:
+        name = config.JSON_BACKEND
+        if name == "auto":
+            name = "orjson" if "orjson" in decoders else "json"
+        if name not in decoders:
+            logger.warning(f"JSON backend {name} is not installed. Falling back to json.")
+            name = "json"
+        _decoder = decoders[name]
+    return _decoder
+
+
+def set_decoder(decoder: Optional[Decoder]) -> None:
+    global _decoder
+    _decoder = decoder
+
+
+def decode(content: Union[bytes, str]) -> Any:
+    """Decodes a JSON document with the configured backend.
+
+    The whole tree is returned as the backend built it. Dropping unused item fields afterwards costs more than it
+    saves, since the backend has allocated them already.
+    """
+    return get_decoder()(content)
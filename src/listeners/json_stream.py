@@ -0,0 +1,72 @@
+import json
+from typing import AsyncIterator, Iterable, Optional
+
+_WHITESPACE = " \t\n\r"
+
+
+def project(item: dict, fields: Optional[Iterable[str]]) -> dict:
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+async def iter_json_array(chunks: AsyncIterator[str], key: str,
+                          fields: Optional[Iterable[str]] = None) -> AsyncIterator[dict]:
+    """Yields the objects of the first array stored under `key` while the document is still being received.
+
+    Only the item currently being decoded is held in memory, so the peak memory does not depend on the size of the
+    document. The items have to be JSON objects or arrays, because a number cut off at a chunk border would decode.
+    """
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    buffer = ""
+    position = -1
+    chunks = chunks.__aiter__()
+
+    async def read() -> bool:
+        nonlocal buffer
+        try:
+            buffer += await chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        return True
+
+    while position == -1:
+        index = buffer.find(marker)
+        if index != -1:
+            position = index + len(marker)
+        else:
+            buffer = buffer[-len(marker):]
+            if not await read():
+                raise ValueError(f"Key {key} not found in JSON document.")
+
+    while True:
+        stripped = buffer[position:].lstrip(_WHITESPACE + ":")
+        if stripped:
+            if stripped[0] != "[":
+                raise ValueError(f"Key {key} does not hold a JSON array.")
+            buffer = stripped[1:]
+            position = 0
+            break
+        if not await read():
+            raise ValueError("Unexpected end of JSON document.")
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE + ",":
+            position += 1
+        if position == len(buffer):
+            buffer, position = "", 0
+            if not await read():
+                raise ValueError("Unexpected end of JSON document.")
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            buffer, position = buffer[position:], 0
+            if not await read():
+                raise
+            continue
+        yield project(item, fields)
+        buffer, position = buffer[end:], 0
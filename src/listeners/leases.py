@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional, Protocol, Set
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class LeaseStore(Protocol):
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        ...
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        ...
+
+
+class LeaseManager:
+    """Keeps the leases on sources shared by several replicas, so each source is polled by exactly one of them.
+
+    A lease is renewed every renew_interval and lapses after ttl, at which point another replica may take it over.
+    A lease counts as lost as soon as it could not be renewed within ttl, even if the store is unreachable, so two
+    replicas never poll a source at the same time.
+    """
+
+    def __init__(self, store: LeaseStore, owner: Optional[str] = None, ttl: float = config.LEASE_TTL,
+                 renew_interval: float = config.LEASE_RENEW_INTERVAL):
+        self.store = store
+        self.owner = owner if owner is not None else f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self._names: Set[str] = set()
+        self._held: Set[str] = set()
+        self._renewed_at = 0.0
+
+    def add(self, name: str) -> None:
+        self._names.add(name)
+
+    def holds(self, name: str) -> bool:
+        return name in self._held and time.monotonic() - self._renewed_at < self.ttl
+
+    async def renew(self) -> None:
+        started_at = time.monotonic()
+        held = set()
+        try:
+            for name in sorted(self._names):
+                if await self.store.acquire_lease(name, self.owner, self.ttl):
+                    held.add(name)
+        except Exception:
+            logger.exception(f"Could not renew leases of {self.owner}. Pausing all sources until they are renewed.")
+            held = set()
+        for name in sorted(held - self._held):
+            logger.info(f"{self.owner} acquired the lease on {name}.")
+        for name in sorted(self._held - held):
+            logger.warning(f"{self.owner} lost the lease on {name}.")
+        self._held = held
+        self._renewed_at = started_at
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self.renew()
+
+    async def release_all(self) -> None:
+        # Releasing is only a courtesy to let another replica take over before the leases expire.
+        held, self._held = self._held, set()
+        try:
+            for name in sorted(held):
+                await self.store.release_lease(name, self.owner)
+        except Exception:
+            logger.exception(f"Could not release leases of {self.owner}. They expire in {self.ttl} seconds.")
@@ -1,16 +1,141 @@
 import asyncio
-from typing import Any, Callable, Coroutine
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from src.article import Article
+from src.listeners.checkpoints import CheckpointQueue, CheckpointStore
+from src.listeners.helpers import close_client
+from src.listeners.leases import LeaseManager
+from src.listeners.pipeline import ArticlePipeline
+from src.listeners.scheduler import PollScheduler
+from src.listeners.seen_urls import SeenUrls
+from src.listeners.source import Source
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
 
 
 class NewsListener:
-    def __init__(self):
+    def __init__(self, pipeline: Optional[ArticlePipeline] = None, checkpoints: Optional[CheckpointStore] = None,
+                 callback: Optional[Callable[[List[Article]], Awaitable[Any]]] = None,
+                 leases: Optional[LeaseManager] = None):
         self.loop = asyncio.get_event_loop()
         asyncio.set_event_loop(self.loop)
         self.tasks = []
+        self.pipeline = pipeline
+        self.checkpoints = checkpoints
+        self.callback = callback if callback is not None or pipeline is None else pipeline.put
+        self.leases = leases
+        self.shutdown_callbacks: List[Callable[[], Awaitable[None]]] = []
+        self.scheduler = PollScheduler()
+        self.checkpoint_queues: Dict[str, CheckpointQueue] = {}
+        # Last saved watermark of every source and the URLs of the articles it covers.
+        self.saved_watermarks: Dict[str, Tuple[Any, List[str]]] = {}
 
     def add_listener(self, listener: Callable[[Any], Coroutine], *args, **kwargs) -> None:
         self.tasks.append(listener(*args, **kwargs))
 
+    def add_source(self, source: Source) -> None:
+        if self.callback is None:
+            raise ValueError(f"Cannot listen to {source} without a pipeline or a callback for its articles")
+        if self.leases is not None:
+            self.leases.add(source.key)
+        self.tasks.append(self.listen_to_source(source))
+
+    def add_shutdown_callback(self, callback: Callable[[], Awaitable[None]]) -> None:
+        self.shutdown_callbacks.append(callback)
+
+    async def wait_for_checkpoints(self) -> None:
+        await asyncio.gather(*(checkpoint_queue.join() for checkpoint_queue in self.checkpoint_queues.values()))
+
+    async def listen_to_source(self, source: Source) -> None:
+        schedule = self.scheduler.schedule_for(source.key, source.poll_interval)
+        checkpoint_queue = self.checkpoint_queues.setdefault(source.key, CheckpointQueue())
+        seen_urls = SeenUrls()
+        watermark = None
+        while True:
+            if self.leases is not None and not self.leases.holds(source.key):
+                # Another replica owns the source and moves its checkpoint on, so reload it once the lease is ours.
+                watermark = None
+                await asyncio.sleep(self.leases.renew_interval)
+                continue
+            if watermark is None:
+                watermark, delivered_urls = await source.load_watermark(self.checkpoints)
+                self.saved_watermarks[source.key] = watermark, delivered_urls
+                for url in delivered_urls:
+                    seen_urls.add(url)
+                logger.info(f"Starting to listen to new {source} articles. From {watermark}...")
+            if checkpoint_queue.failed:
+                # The watermark moved past articles the sinks did not commit. Polling again from the last saved
+                # checkpoint fetches them again.
+                await checkpoint_queue.rewind()
+                watermark, delivered_urls = self.saved_watermarks[source.key]
+                seen_urls = SeenUrls()
+                for url in delivered_urls:
+                    seen_urls.add(url)
+                logger.warning(f"Articles were not committed. Listening to {source} again from {watermark}.")
+            delivered = 0
+            # Most sources answer a poll with one result, sources catching up stream several, oldest first, so
+            # progress is checkpointed along the way.
+            results = source.poll_batches(watermark).__aiter__()
+            while True:
+                try:
+                    result = await results.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception:
+                    logger.exception(f"Exception occurred while trying to scrape {source}")
+                    break
+                if result is not None:
+                    articles = await self._deliver(source, seen_urls, checkpoint_queue, watermark, result)
+                    watermark = result[0]
+                    delivered += len(articles)
+            schedule.record(delivered)
+            await schedule.wait()
+
+    async def _deliver(self, source: Source, seen_urls: SeenUrls, checkpoint_queue: CheckpointQueue, watermark: Any,
+                       result: Tuple[Any, List[Article]]) -> List[Article]:
+        new_watermark, articles = result
+        articles = seen_urls.filter_new(articles)
+        commits = []
+        if articles:
+            logger.info(f"Calling callback with {len(articles)} new {source} articles.")
+            # A callback that buffers the articles returns a future that is done once they are committed, the
+            # watermark is only checkpointed after that.
+            commit = await self.callback(articles)
+            if asyncio.isfuture(commit):
+                commits.append(commit)
+        # Sources return the articles at the watermark time again, those alone do not need a new checkpoint.
+        if self.checkpoints is not None and (articles or new_watermark != watermark):
+            checkpoint_queue.add(commits, functools.partial(self._save_watermark, source, new_watermark, articles))
+        return articles
+
+    async def _save_watermark(self, source: Source, watermark: Any, articles: List[Article]) -> None:
+        await source.save_watermark(self.checkpoints, watermark, articles)
+        self.saved_watermarks[source.key] = watermark, [article.url for article in articles]
+
     def start_listeners(self) -> None:
+        if self.pipeline is not None:
+            self.pipeline.start()
+            self.tasks.append(self.pipeline.replay_spill())
+        if self.leases is not None:
+            self.loop.run_until_complete(self.leases.renew())
+            self.tasks.append(self.leases.run())
         future_tasks = asyncio.gather(*self.tasks)
-        self.loop.run_until_complete(future_tasks)
+        try:
+            self.loop.run_until_complete(future_tasks)
+        finally:
+            future_tasks.cancel()
+            self.loop.run_until_complete(asyncio.gather(future_tasks, return_exceptions=True))
+            steps = [] if self.pipeline is None else [self.pipeline.stop]
+            if self.leases is not None:
+                steps.append(self.leases.release_all)
+            # A step that fails, say a flush while the database is unreachable, must not keep the later ones from
+            # flushing and closing the other sinks.
+            for step in steps + self.shutdown_callbacks + [close_client]:
+                try:
+                    self.loop.run_until_complete(step())
+                except Exception:
+                    logger.exception(f"Exception occurred while shutting down in {step}")
@@ -1,112 +1,164 @@
 import datetime
-from typing import Callable, Coroutine, Optional, Any, Tuple
+import json
+import os
+import re
+from typing import AsyncIterator, Iterable, Optional, Tuple, List
 import logging
 import pytz
-import ciso8601
-import requests
-from ratelimit import limits, RateLimitException
 
 from src.listeners.nyt.exceptions import NYTException
-from src.article import Article
-from src.listeners.helpers import get_header_with_random_user_agent, sleep_and_retry, get_async
+from src.article import Article, from_epoch_us, to_epoch_us
+from src.listeners.json_stream import iter_json_array
+from src.listeners.registry import register
+from src.listeners.source import Source
+from src.listeners.timestamps import GMT, count_newer, parse_epoch_us
 import src.config as config
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+ARCHIVE_FIELDS = ("web_url", "pub_date", "section_name", "subsection_name", "headline", "_id")
+# The archive names sections by their display name, the Newswire and NYT_SECTIONS by their URL slug. Names that are
+# not listed map to their lower-cased words joined by hyphens.
+ARCHIVE_SECTION_SLUGS = {
+    "U.S.": "us",
+    "New York": "nyregion",
+    "Business Day": "business",
+    "Real Estate": "realestate",
+    "T Magazine": "t-magazine",
+    "The Upshot": "upshot",
+    "Sunday Review": "sundayreview",
+    "Crosswords & Games": "crosswords",
+    "Fashion & Style": "fashion",
+}
 
-def get_listener(callback: Callable[[Article], None], subsections: list, *args, **kwargs) -> Callable[[Any], Coroutine]:
-    logger.info("Getting Listener.")
-    nyt = NYT(callback, subsections, *args, **kwargs)
-    return nyt.listen_to_nyt
 
+@register("nyt")
+class NYT(Source):
+    default_rate_limit = (5, 60, 1)
 
-class NYT:
-    def __init__(self, callback: Callable[[Article], None], subsections: list, _=None):
-        self.callback = callback
-        self.subsections = subsections
+    def __init__(self, subsections: Iterable[str] = (), sections: Optional[Iterable[str]] = None,
+                 api_key: Optional[str] = None, **kwargs):
+        super().__init__(api_key=api_key if api_key is not None else config.NYT_API_KEY, **kwargs)
+        self.subsections = set(subsections)
+        self.sections = set(sections if sections is not None else config.NYT_SECTIONS)
+        # Newest article of the current, unfinished archive month, once it has been read.
+        self._archive_newest: Optional[datetime.datetime] = None
 
-    async def listen_to_nyt(self) -> None:
-        article = None
-        newest_time = datetime.datetime.utcnow().replace(tzinfo=pytz.timezone("GMT"))
-        logger.info(f"Starting to listen to new NYT articles. From {newest_time}...")
-        while True:
-            try:
-                result = await self.get_new_nyt(newest_time)
-                if result is not None:
-                    logger.info("Found new nyt article.")
-                    newest_time, article = result
-            except NYTException:
-                logger.exception("Exception occurred while trying to scrape NYT")
-            if not article.empty():
-                logger.info("Calling callback with new nyt article.")
-                self.callback(article)
-
-    async def get_new_nyt(self, newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        is_recent = self._time_in_recent_range(newest_time)
-        articles = await self._get_articles(is_recent, newest_time)
-        logger.info("Got results from page containing the newest article.")
-        return self._extract_most_recent_article(is_recent, articles, newest_time)
+    async def poll(self, newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, List[Article]]]:
+        # The archive of the current month lags behind by about a day. Once the watermark reached its newest article,
+        # streaming the month again cannot find anything new, so the Newswire takes over.
+        if self._time_in_recent_range(newest_time) or \
+                (self._archive_newest is not None and newest_time >= self._archive_newest):
+            articles = []
+            for section in sorted(self.sections):
+                results = await self._get_newswire(section)
+                articles.extend(self._extract_new_articles(results, newest_time))
+            logger.info(f"Got Newswire results for {len(self.sections)} sections.")
+            if not articles:
+                return None
+            articles.sort(key=lambda article: article.time)
+            return articles[-1].time, articles
+        # The archive month is filtered while it streams in, so only the new articles are ever held in memory.
+        newest_epoch = to_epoch_us(newest_time)
+        newest_seen = newest_epoch
+        articles = []
+        async for doc in self._iter_archive_month(newest_time):
+            epoch = parse_epoch_us(doc["pub_date"])
+            newest_seen = max(newest_seen, epoch)
+            article = self._archive_article(doc, epoch, newest_epoch)
+            if article is not None:
+                articles.append(article)
+        logger.info("Got results from the archive month containing the newest article.")
+        articles.sort(key=lambda article: article.time)
+        # A finished month moves the watermark to its end so the next poll continues with the following month. The
+        # current month is only covered up to its newest archived article, the Newswire continues from there.
+        if self._month_is_complete(newest_time):
+            return self._end_of_month(newest_time), articles
+        self._archive_newest = from_epoch_us(newest_seen)
+        return self._archive_newest, articles
 
     @staticmethod
     def _time_in_recent_range(newest_time: datetime.datetime) -> bool:
-        return (datetime.datetime.now(pytz.timezone("GMT")) - newest_time).total_seconds() <= 86400
+        return (datetime.datetime.now(GMT) - newest_time).total_seconds() <= 86400
 
     @staticmethod
-    async def _get_articles(is_recent: bool, newest_time: datetime.datetime) -> list:
-        if is_recent:
-            url = f"https://api.nytimes.com/svc/news/v3/content/all/world.json?api-key={config.NYT_API_KEY}&limit=500"
-            data = await request_nyt_api(url)
-            json = data.json()
-            results = json["results"]
-        else:
-            year = int(newest_time.strftime('%Y'))
-            month = int(newest_time.strftime('%m'))
-            url = f"https://api.nytimes.com/svc/archive/v1/{year}/{month}.json?api-key=" + config.NYT_API_KEY
-            data = await request_nyt_api(url)
-            json = data.json()
-            results = json["response"]["docs"]
-        return results
+    def _end_of_month(time: datetime.datetime) -> datetime.datetime:
+        time = time.astimezone(pytz.utc)
+        next_month = datetime.datetime(time.year + time.month // 12, time.month % 12 + 1, 1, tzinfo=pytz.utc)
+        return next_month - datetime.timedelta(microseconds=1)
 
-    def _extract_most_recent_article(self, is_recent: bool, articles: list,
-                                     newest_time: datetime.datetime) -> Optional[Tuple[datetime.datetime, Article]]:
-        t = 0
-        i = 0
-        if is_recent:
-            for i in range(len(articles)):
-                article = articles[i]
-                subsection = article.get("subsection", None)
-                if subsection not in self.subsections or subsection is None:
-                    continue
-                t = ciso8601.parse_datetime(article["published_date"])
-                if t < newest_time:
-                    break
-            result_index = i + 1
-            if result_index > len(articles):
-                return None
-            url = articles[result_index]["url"]
-        else:
-            for i in range(len(articles)):
-                article = articles[i]
-                subsection = article.get("subsection_name", None)
-                if subsection not in self.subsections or subsection is None:
-                    continue
-                t = ciso8601.parse_datetime(article["pub_date"])
-                if t > newest_time:
-                    break
-            result_index = i + 1
-            if result_index > len(articles):
-                return None
-            url = articles[result_index]["web_url"]
-        return t, Article(url, t, "n")
+    @staticmethod
+    def _month_is_complete(time: datetime.datetime) -> bool:
+        # The archive is only updated once a day, so a month is final a day after it ended.
+        return datetime.datetime.now(pytz.utc) - NYT._end_of_month(time) > datetime.timedelta(days=1)
 
+    async def _get_newswire(self, section: str) -> list:
+        url = f"https://api.nytimes.com/svc/news/v3/content/all/{section}.json?api-key={self.api_key}&limit=500"
+        return (await self.request_json(url))["results"]
+
+    async def _iter_archive_month(self, newest_time: datetime.datetime) -> AsyncIterator[dict]:
+        year = int(newest_time.strftime('%Y'))
+        month = int(newest_time.strftime('%m'))
+        path = os.path.join(config.NYT_ARCHIVE_CACHE_DIR, f"{year}-{month:02d}.jsonl")
+        if os.path.exists(path):
+            logger.info(f"Reading NYT archive {year}/{month} from {path}.")
+            with open(path) as file:
+                for line in file:
+                    yield json.loads(line)
+            return
+        url = f"https://api.nytimes.com/svc/archive/v1/{year}/{month}.json?api-key=" + self.api_key
+        # A finished month never changes again, so it is written to the cache as it streams in and only moved into
+        # place once the whole month has been read.
+        cache = None
+        if NYT._month_is_complete(newest_time):
+            os.makedirs(config.NYT_ARCHIVE_CACHE_DIR, exist_ok=True)
+            cache = open(path + ".tmp", "w")
+        complete = False
+        try:
+            async with self.stream(url) as response:
+                async for doc in iter_json_array(response.aiter_text(), "docs", ARCHIVE_FIELDS):
+                    if cache is not None:
+                        cache.write(json.dumps(doc) + "\n")
+                    yield doc
+            complete = True
+        except ValueError as error:
+            raise NYTException(f"Could not parse NYT archive {year}/{month}.") from error
+        finally:
+            if cache is not None:
+                cache.close()
+                if complete:
+                    os.replace(path + ".tmp", path)
+                else:
+                    os.remove(path + ".tmp")
+
+    def _extract_new_articles(self, results: list, newest_time: datetime.datetime) -> List[Article]:
+        articles = []
+        # The Newswire is ordered newest first, so the new articles are the prefix not older than the watermark.
+        count = count_newer(results, to_epoch_us(newest_time) - 1,
+                            lambda result: parse_epoch_us(result["published_date"]))
+        for result in results[:count]:
+            if self.subsections and result.get("subsection", None) not in self.subsections:
+                continue
+            t = from_epoch_us(parse_epoch_us(result["published_date"]))
+            articles.append(Article(result["url"], t, "n", title=result.get("title"),
+                                    section=result.get("section"), source_id=result.get("uri")))
+        return articles
+
+    @staticmethod
+    def _section_slug(section_name: str) -> str:
+        slug = ARCHIVE_SECTION_SLUGS.get(section_name)
+        if slug is None:
+            slug = re.sub(r"[^a-z0-9]+", "-", section_name.lower()).strip("-")
+        return slug
 
-@sleep_and_retry
-@limits(calls=5, period=60)
-async def request_nyt_api(url: str) -> requests.Response:
-    headers = get_header_with_random_user_agent()
-    response = await get_async(url, headers=headers)
-    if response.status_code != 200:
-        logger.error(f"NYT API returned status code {response.status_code}. Sleeping for 60 seconds.")
-        raise RateLimitException("Rate limit exceeded.", 60)
-    return response
+    def _archive_article(self, doc: dict, epoch: int, newest_epoch: int) -> Optional[Article]:
+        if epoch < newest_epoch:
+            return None
+        section = doc.get("section_name", None)
+        if section is not None and self._section_slug(section) not in self.sections:
+            return None
+        if self.subsections and doc.get("subsection_name", None) not in self.subsections:
+            return None
+        return Article(doc["web_url"], from_epoch_us(epoch), "n", title=(doc.get("headline") or {}).get("main"),
+                       section=section, source_id=doc.get("_id"))
@@ -1,3 +1,172 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+import pytz
+
+from src.listeners.nyt.exceptions import NYTException
+from src.listeners.nyt.nyt import NYT
+
+
+def make_archive_stream(docs: list, truncate: int = None) -> MagicMock:
+    text = json.dumps({"response": {"docs": docs}})[:truncate]
+
+    async def aiter_text():
+        for i in range(0, len(text), 16):
+            yield text[i:i + 16]
+
+    @asynccontextmanager
+    async def stream(url):
+        response = MagicMock()
+        response.aiter_text = aiter_text
+        yield response
+
+    return MagicMock(side_effect=stream)
+
+
 # Required environment variables: None
-def test():
-    pass
+class NewArticlesTestCase(unittest.TestCase):
+    def test_returns_every_matching_article_newer_than_watermark(self):
+        nyt = NYT(["Europe"])
+        newest_time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        results = [
+            {"url": "b", "subsection": "Europe", "published_date": "2023-01-01T08:00:00-05:00"},
+            {"url": "asia", "subsection": "Asia", "published_date": "2023-01-01T07:45:00-05:00"},
+            {"url": "a", "subsection": "Europe", "published_date": "2023-01-01T07:30:00-05:00"},
+            {"url": "old", "subsection": "Europe", "published_date": "2023-01-01T06:00:00-05:00"},
+        ]
+
+        articles = nyt._extract_new_articles(results, newest_time)
+
+        self.assertEqual([article.url for article in articles], ["b", "a"])
+
+    def test_stops_at_watermark_in_newswire(self):
+        nyt = NYT(["Europe"])
+        newest_time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        results = [
+            {"url": "a", "subsection": "Europe", "published_date": "2023-01-01T07:30:00-05:00"},
+            {"url": "old", "subsection": "Europe", "published_date": "2023-01-01T06:00:00-05:00"},
+            {"url": "misordered", "subsection": "Europe", "published_date": "2023-01-01T09:00:00-05:00"},
+        ]
+
+        articles = nyt._extract_new_articles(results, newest_time)
+
+        self.assertEqual([article.url for article in articles], ["a"])
+
+    def test_archive_section_names_match_section_slugs(self):
+        nyt = NYT([], sections=["us", "nyregion", "world"])
+        docs = [
+            {"web_url": "us", "section_name": "U.S."},
+            {"web_url": "nyregion", "section_name": "New York"},
+            {"web_url": "world", "section_name": "World"},
+            {"web_url": "business", "section_name": "Business Day"},
+        ]
+
+        articles = [nyt._archive_article(doc, 1, 0) for doc in docs]
+
+        self.assertEqual([article.url for article in articles if article is not None], ["us", "nyregion", "world"])
+        self.assertEqual(NYT._section_slug("Real Estate"), "realestate")
+        self.assertEqual(NYT._section_slug("Your Money"), "your-money")
+
+
+class NewswireTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_fetches_each_section_and_merges_in_order(self):
+        nyt = NYT([], sections=["world", "business"])
+        newest_time = datetime.datetime.now(pytz.utc) - datetime.timedelta(hours=1)
+        newswire = {
+            "world": [{"url": "world", "subsection": "Europe",
+                       "published_date": (newest_time + datetime.timedelta(minutes=20)).isoformat()}],
+            "business": [{"url": "business", "subsection": "",
+                          "published_date": (newest_time + datetime.timedelta(minutes=10)).isoformat()}],
+        }
+
+        async def get_newswire(section):
+            return newswire[section]
+
+        with patch.object(NYT, "_get_newswire", side_effect=get_newswire) as mock:
+            new_time, articles = await nyt.poll(newest_time)
+
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual([article.url for article in articles], ["business", "world"])
+        self.assertEqual(new_time, newest_time + datetime.timedelta(minutes=20))
+
+
+class ArchiveTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.nyt = NYT(["Europe"])
+        self.newest_time = datetime.datetime(2020, 1, 10, tzinfo=pytz.utc)
+        self.docs = [
+            {"web_url": "a", "pub_date": "2020-01-20T10:00:00+0000", "section_name": "World",
+             "subsection_name": "Europe", "abstract": "x"},
+            {"web_url": "old", "pub_date": "2020-01-05T10:00:00+0000", "subsection_name": "Europe"},
+            {"web_url": "asia", "pub_date": "2020-01-21T10:00:00+0000", "subsection_name": "Asia"},
+            {"web_url": "sports", "pub_date": "2020-01-21T10:00:00+0000", "section_name": "Sports",
+             "subsection_name": "Europe"},
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_finished_month_is_streamed_cached_and_skipped(self):
+        stream = make_archive_stream(self.docs)
+        with patch.object(self.nyt, "stream", stream), \
+                patch("src.config.NYT_ARCHIVE_CACHE_DIR", self.directory.name):
+            new_time, articles = await self.nyt.poll(self.newest_time)
+            cached = [doc async for doc in self.nyt._iter_archive_month(self.newest_time)]
+
+        self.assertEqual([article.url for article in articles], ["a"])
+        self.assertEqual(new_time, NYT._end_of_month(self.newest_time))
+        self.assertEqual(stream.call_count, 1)
+        self.assertEqual(len(cached), len(self.docs))
+        self.assertNotIn("abstract", cached[0])
+
+    async def test_broken_stream_leaves_no_cache(self):
+        stream = make_archive_stream(self.docs, truncate=40)
+        with patch.object(self.nyt, "stream", stream), \
+                patch("src.config.NYT_ARCHIVE_CACHE_DIR", self.directory.name):
+            with self.assertRaises(NYTException):
+                await self.nyt.poll(self.newest_time)
+
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    async def test_current_month_hands_over_at_newest_archived_article(self):
+        now = datetime.datetime.now(pytz.utc)
+        newest_time = now - datetime.timedelta(days=3)
+        newest_archived = now - datetime.timedelta(days=2)
+        docs = [{"web_url": "a", "pub_date": newest_archived.isoformat(), "subsection_name": "Europe"},
+                {"web_url": "other", "pub_date": (newest_archived - datetime.timedelta(hours=1)).isoformat(),
+                 "subsection_name": "Asia"}]
+        with patch.object(self.nyt, "stream", make_archive_stream(docs)), \
+                patch.object(NYT, "_month_is_complete", return_value=False), \
+                patch("src.config.NYT_ARCHIVE_CACHE_DIR", self.directory.name):
+            new_time, articles = await self.nyt.poll(newest_time)
+
+        self.assertEqual([article.url for article in articles], ["a"])
+        self.assertEqual(new_time, newest_archived)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    async def test_newswire_takes_over_once_current_month_is_read(self):
+        now = datetime.datetime.now(pytz.utc)
+        newest_archived = now - datetime.timedelta(days=2)
+        docs = [{"web_url": "a", "pub_date": newest_archived.isoformat(), "subsection_name": "Europe"}]
+        newswire = [{"url": "b", "subsection": "Europe",
+                     "published_date": (now - datetime.timedelta(hours=1)).isoformat()}]
+        stream = make_archive_stream(docs)
+        with patch.object(self.nyt, "stream", stream), \
+                patch.object(NYT, "_get_newswire", return_value=newswire), \
+                patch.object(NYT, "_month_is_complete", return_value=False), \
+                patch("src.config.NYT_ARCHIVE_CACHE_DIR", self.directory.name):
+            new_time, _ = await self.nyt.poll(now - datetime.timedelta(days=3))
+            new_time, articles = await self.nyt.poll(new_time)
+
+        self.assertEqual(stream.call_count, 1)
+        self.assertEqual([article.url for article in articles], ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
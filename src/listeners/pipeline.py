@@ -0,0 +1,188 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+import ciso8601
+
+import src.config as config
+from src.article import FIELDS, Article
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class PipelineFullError(Exception):
+    """The sinks did not make room for a batch in time and it was dropped."""
+
+
+class PipelineMetrics:
+    def __init__(self):
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.full_events = 0
+        self.put_wait_seconds = 0.0
+        self.max_queue_size = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    def __str__(self):
+        return (f"PipelineMetrics(submitted={self.submitted}, processed={self.processed}, failed={self.failed}, "
+                f"full_events={self.full_events}, put_wait_seconds={self.put_wait_seconds:.2f}, "
+                f"max_queue_size={self.max_queue_size}, spilled={self.spilled}, dropped={self.dropped})")
+
+
+class ArticlePipeline:
+    def __init__(self, sinks: List[Callable[[List[Article]], Any]],
+                 max_size: int = config.PIPELINE_MAX_SIZE, workers: int = config.PIPELINE_WORKERS,
+                 put_timeout: float = config.PIPELINE_PUT_TIMEOUT, spill_path: str = config.PIPELINE_SPILL_PATH):
+        self.sinks = sinks
+        self.max_size = max_size
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+        self.metrics = PipelineMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sink")
+        self._worker_tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._queue = None
+        logger.info(f"Pipeline stopped. {self.metrics}")
+
+    async def put(self, articles: List[Article]) -> asyncio.Future:
+        """Queues a batch for the sinks and returns a future that is done once every sink committed it.
+
+        A batch the sinks did not make room for within put_timeout is appended to spill_path instead, or dropped if
+        there is none, so a stuck sink cannot stall the listeners forever. A spilled batch is done once it is written,
+        replay_spill hands it to the sinks on the next start. A dropped batch fails its future.
+        """
+        commit = asyncio.get_event_loop().create_future()
+        if self._queue.full():
+            self.metrics.full_events += 1
+            logger.warning(f"Pipeline queue is full. Sinks are falling behind. {self.metrics}")
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._queue.put((articles, commit)), self.put_timeout)
+        except asyncio.TimeoutError:
+            await self._overflow(articles, commit)
+            return commit
+        finally:
+            self.metrics.put_wait_seconds += time.monotonic() - start
+        self.metrics.submitted += 1
+        self.metrics.max_queue_size = max(self.metrics.max_queue_size, self._queue.qsize())
+        return commit
+
+    async def _overflow(self, articles: List[Article], commit: asyncio.Future) -> None:
+        if self.spill_path:
+            try:
+                await asyncio.get_event_loop().run_in_executor(self._executor, self._spill, articles)
+                self.metrics.spilled += 1
+                logger.error(f"Pipeline queue stayed full for {self.put_timeout}s, spilled {len(articles)} articles "
+                             f"to {self.spill_path}. {self.metrics}")
+                commit.set_result(None)
+                return
+            except OSError:
+                logger.exception(f"Could not spill articles to {self.spill_path}")
+        self.metrics.dropped += 1
+        logger.error(f"Pipeline queue stayed full for {self.put_timeout}s, dropped {len(articles)} articles. "
+                     f"{self.metrics}")
+        commit.set_exception(PipelineFullError(f"Dropped {len(articles)} articles"))
+
+    def _spill(self, articles: List[Article]) -> None:
+        rows = [{field: getattr(article, field) for field in FIELDS} for article in articles]
+        with open(self.spill_path, "a") as file:
+            file.write(json.dumps(rows, default=lambda time: time.isoformat()) + "\n")
+
+    async def replay_spill(self) -> None:
+        """Queues the batches spilled by earlier runs and removes them once every sink committed them."""
+        if not self.spill_path:
+            return
+        replay_path = self.spill_path + ".replay"
+        loop = asyncio.get_event_loop()
+        # Batches are moved aside first so batches spilled while replaying are kept apart. A replay that did not
+        # finish left its batches behind, they are replayed again.
+        batches = await loop.run_in_executor(self._executor, self._take_spill, replay_path)
+        if not batches:
+            return
+        logger.info(f"Replaying {len(batches)} spilled batches from {replay_path}.")
+        commits = []
+        for articles in batches:
+            commit = loop.create_future()
+            await self._queue.put((articles, commit))
+            self.metrics.submitted += 1
+            commits.append(commit)
+        results = await asyncio.gather(*commits, return_exceptions=True)
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            logger.error(f"{len(failed)} of {len(batches)} spilled batches were not committed, they are kept in "
+                         f"{replay_path}: {failed[0]!r}")
+            return
+        await loop.run_in_executor(self._executor, os.remove, replay_path)
+
+    def _take_spill(self, replay_path: str) -> List[List[Article]]:
+        if os.path.exists(self.spill_path):
+            with open(self.spill_path) as spill, open(replay_path, "a") as replay:
+                replay.write(spill.read())
+            os.remove(self.spill_path)
+        if not os.path.exists(replay_path):
+            return []
+        with open(replay_path) as replay:
+            return [[Article(**{**row, "time": None if row["time"] is None else ciso8601.parse_datetime(row["time"])})
+                     for row in json.loads(line)] for line in replay if line.strip()]
+
+    def qsize(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def _work(self) -> None:
+        while True:
+            articles, commit = await self._queue.get()
+            try:
+                # Buffering sinks return a future that is done once the batch is committed, the others are done
+                # when they return.
+                pending = []
+                for sink in self.sinks:
+                    result = await self._run_sink(sink, articles)
+                    if isinstance(result, concurrent.futures.Future):
+                        result = asyncio.wrap_future(result)
+                    if asyncio.isfuture(result):
+                        pending.append(result)
+                asyncio.gather(*pending).add_done_callback(lambda done, commit=commit: self._committed(done, commit))
+            except Exception as error:
+                self.metrics.failed += 1
+                logger.exception("Exception occurred while passing articles to a sink")
+                commit.set_exception(error)
+            finally:
+                self._queue.task_done()
+
+    def _committed(self, done: asyncio.Future, commit: asyncio.Future) -> None:
+        error = None if done.cancelled() else done.exception()
+        if done.cancelled() or error is not None:
+            self.metrics.failed += 1
+            logger.error(f"Sinks failed to commit a batch: {error!r}")
+            commit.set_exception(error if error is not None else asyncio.CancelledError())
+        else:
+            self.metrics.processed += 1
+            commit.set_result(None)
+
+    async def _run_sink(self, sink: Callable[[List[Article]], Any], articles: List[Article]) -> Any:
+        if asyncio.iscoroutinefunction(sink):
+            return await sink(articles)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, sink, articles)
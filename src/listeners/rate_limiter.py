@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class TokenBucket:
+    def __init__(self, calls: int, period: float, burst: int = 1):
+        self.rate = calls / period
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        return now
+
+    async def acquire(self) -> None:
+        # asyncio.Lock wakes its waiters in FIFO order, so callers are served in arrival order.
+        async with self._lock:
+            while True:
+                now = self._refill()
+                delay = self._blocked_until - now
+                if delay <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = max(delay, (1 - self._tokens) / self.rate)
+                await asyncio.sleep(delay)
+
+    def update(self, calls: int, period: float, burst: Optional[int] = None) -> None:
+        self._refill()
+        self.rate = calls / period
+        if burst is not None:
+            self.capacity = float(burst)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def block(self, seconds: float) -> None:
+        now = self._refill()
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        limit = headers.get("x-ratelimit-limit-minute")
+        if limit is not None and limit.isdigit() and int(limit) > 0:
+            if int(limit) / 60 != self.rate:
+                logger.debug(f"Updating rate limit to {limit} calls per minute.")
+                self.update(int(limit), 60)
+        remaining = headers.get("x-ratelimit-remaining-minute")
+        if remaining is not None and remaining.isdigit():
+            self._refill()
+            self._tokens = min(self._tokens, float(remaining))
+        retry_after = headers.get("retry-after")
+        if retry_after is not None and retry_after.isdigit():
+            self.block(float(retry_after))
+
+
+class RateLimiter:
+    """Token buckets per source type and API key.
+
+    Two configured sources of the same type with different keys each get their own limit, sources sharing a key
+    share its bucket.
+    """
+
+    def __init__(self):
+        self._limits: Dict[Tuple[str, str], Tuple[int, float, int]] = {}
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def configure(self, source: str, calls: int, period: float, burst: int = 1, key: str = "") -> None:
+        self._limits[(source, key)] = (calls, period, burst)
+        if (source, key) in self._buckets:
+            self._buckets[(source, key)].update(calls, period, burst)
+
+    def bucket(self, source: str, key: str = "") -> TokenBucket:
+        if (source, key) not in self._buckets:
+            calls, period, burst = self._limits[(source, key)]
+            self._buckets[(source, key)] = TokenBucket(calls, period, burst)
+        return self._buckets[(source, key)]
+
+    async def acquire(self, source: str, key: str = "") -> None:
+        await self.bucket(source, key).acquire()
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,52 @@
+import importlib
+import json
+import logging
+from typing import Callable, Dict, List, Type
+
+from src.listeners.source import Source
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+BUILTIN_SOURCES = {
+    "cnbc": "src.listeners.cnbc.cnbc",
+    "guardian": "src.listeners.guardian.guardian",
+    "nyt": "src.listeners.nyt.nyt",
+    "rss": "src.listeners.rss.rss",
+}
+
+_sources: Dict[str, Type[Source]] = {}
+
+
+def register(name: str) -> Callable[[Type[Source]], Type[Source]]:
+    def decorator(source_class: Type[Source]) -> Type[Source]:
+        source_class.name = name
+        _sources[name] = source_class
+        return source_class
+    return decorator
+
+
+def get_source_class(name: str, module: str = None) -> Type[Source]:
+    if name not in _sources:
+        importlib.import_module(module if module is not None else BUILTIN_SOURCES[name])
+    return _sources[name]
+
+
+def create_source(source_config: dict) -> Source:
+    options = dict(source_config)
+    options.pop("enabled", None)
+    source_class = get_source_class(options.pop("type"), options.pop("module", None))
+    return source_class(**options)
+
+
+def load_source_configs(path: str = config.SOURCES_CONFIG) -> List[dict]:
+    with open(path) as file:
+        source_configs = json.load(file)["sources"]
+    return [source_config for source_config in source_configs if source_config.get("enabled", True)]
+
+
+def load_sources(path: str = config.SOURCES_CONFIG) -> List[Source]:
+    sources = [create_source(source_config) for source_config in load_source_configs(path)]
+    logger.info(f"Loaded {len(sources)} sources from {path}: {', '.join(str(source) for source in sources)}")
+    return sources
@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from httpx import Headers, Request, Response
+
+import src.config as config
+
+# The body is stored decoded, so headers describing the encoding on the wire no longer apply to it.
+WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CacheEntry:
+    def __init__(self, url: str, response: Response, ttl: float):
+        self.url = url
+        self.content = response.content
+        self.headers = Headers(response.headers)
+        for header in WIRE_HEADERS:
+            self.headers.pop(header, None)
+        self.expires_at = time.monotonic() + ttl
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + len(self.url)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def validators(self) -> dict:
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def revalidate(self, response: Response, ttl: float) -> None:
+        # A 304 carries the current validators and rate limit headers, the body stays the cached one.
+        for header, value in response.headers.items():
+            if header not in WIRE_HEADERS:
+                self.headers[header] = value
+        self.expires_at = time.monotonic() + ttl
+
+    def to_response(self) -> Response:
+        return Response(200, headers=self.headers, content=self.content, request=Request("GET", self.url))
+
+
+class ResponseCache:
+    """LRU cache of successful GET responses keyed by URL and bounded by the total size of the cached bodies.
+
+    Entries are served without a request until their TTL runs out. Expired entries are kept so the next request can
+    revalidate them with their ETag or Last-Modified validators.
+    """
+
+    def __init__(self, max_bytes: int = config.RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def fresh(self, url: str) -> Optional[Response]:
+        entry = self.get(url)
+        if entry is None or not entry.is_fresh():
+            return None
+        return entry.to_response()
+
+    def put(self, url: str, response: Response, ttl: float) -> None:
+        self.remove(url)
+        entry = CacheEntry(url, response, ttl)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[url] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,2 @@
+class RSSException(Exception):
+    """Base exception class for RSS."""
@@ -0,0 +1,128 @@
+import datetime
+import email.utils
+import logging
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+import ciso8601
+import pytz
+
+from src.article import Article
+from src.listeners.registry import register
+from src.listeners.rss.exceptions import RSSException
+from src.listeners.source import Source
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+ITEM_TAGS = {"item", "entry"}
+# Checked in order, so an Atom entry's published date wins over its updated date.
+TIME_TAGS = ("pubDate", "published", "date", "updated")
+
+
+@register("rss")
+class RSS(Source):
+    """An RSS 2.0 or Atom feed.
+
+    Polls are conditional GETs with the validators of the last successful poll, so an unchanged feed costs a 304
+    without a body. The feed is parsed while it streams in and every item is dropped as soon as it has been read.
+    """
+
+    default_rate_limit = (60, 60, 5)
+    timestamp_field = "time"
+
+    def __init__(self, url: str, origin: str = "r", **kwargs):
+        kwargs.setdefault("key", f"rss:{url}")
+        super().__init__(**kwargs)
+        self.url = url
+        self.origin = origin
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+    async def poll(self, watermark: datetime.datetime) -> Optional[Tuple[datetime.datetime, List[Article]]]:
+        async with self.stream(self.url, extra_headers=self._conditional_headers(), accept=(200, 304)) as response:
+            if response.status_code == 304:
+                return None
+            try:
+                items = [item async for item in iter_feed_items(response.aiter_bytes())]
+            except ParseError as e:
+                raise RSSException(f"Invalid feed {self.url}: {e}") from e
+        # Only remember the validators once the body was read completely, a broken download must be fetched again.
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        items.sort(key=lambda item: item["time"], reverse=True)
+        return self.new_articles(items, watermark)
+
+    def to_article(self, item: dict, time: datetime.datetime) -> Optional[Article]:
+        return Article(url=item["url"], time=time, origin=self.origin, title=item["title"], source_id=item["id"])
+
+    def _conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+async def iter_feed_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    parser = XMLPullParser(events=("end",))
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for item in _read_items(parser):
+            yield item
+    parser.close()
+    for item in _read_items(parser):
+        yield item
+
+
+def _read_items(parser: XMLPullParser) -> Iterator[dict]:
+    for _, element in parser.read_events():
+        if _local_name(element.tag) in ITEM_TAGS:
+            item = _parse_item(element)
+            element.clear()
+            if item is not None:
+                yield item
+
+
+def _parse_item(element: Element) -> Optional[dict]:
+    url = None
+    title = None
+    item_id = None
+    times = {}
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "title":
+            title = (child.text or "").strip() or None
+        elif name in ("guid", "id"):
+            item_id = (child.text or "").strip() or None
+        elif name == "link":
+            if child.get("href") is None:
+                url = url or (child.text or "").strip() or None
+            elif child.get("rel", "alternate") == "alternate":
+                url = url or child.get("href")
+        elif name in TIME_TAGS and child.text:
+            times.setdefault(name, child.text.strip())
+    time = next((_parse_time(times[name]) for name in TIME_TAGS if name in times), None)
+    if url is None or time is None:
+        logger.debug(f"Skipping feed item without link or date: url={url}, times={times}")
+        return None
+    return {"url": url, "time": time, "title": title, "id": item_id}
+
+
+def _parse_time(text: str) -> Optional[datetime.datetime]:
+    try:
+        time = email.utils.parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            time = ciso8601.parse_datetime(text)
+        except ValueError:
+            return None
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=pytz.utc)
+    return time
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
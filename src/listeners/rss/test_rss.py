@@ -0,0 +1,103 @@
+import datetime
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock
+
+import pytz
+
+from src.listeners.rss.exceptions import RSSException
+from src.listeners.rss.rss import RSS
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title>World</title>
+    <item><title>New</title><link>https://example.com/new</link>
+      <pubDate>Sun, 01 Jan 2023 12:00:00 GMT</pubDate></item>
+    <item><title>Middle</title><link> https://example.com/middle </link>
+      <dc:date>2023-01-01T11:00:00Z</dc:date></item>
+    <item><title>Undated</title><link>https://example.com/undated</link></item>
+    <item><title>Old</title><link>https://example.com/old</link>
+      <pubDate>Sun, 01 Jan 2023 09:00:00 +0000</pubDate></item>
+  </channel>
+</rss>"""
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <link rel="self" href="https://example.com/self"/>
+    <link href="https://example.com/atom"/>
+    <updated>2023-01-02T00:00:00Z</updated>
+    <published>2023-01-01T13:00:00+01:00</published>
+  </entry>
+</feed>"""
+
+
+def make_stream(responses: list) -> MagicMock:
+    @asynccontextmanager
+    async def stream(url, extra_headers=None, accept=(200,)):
+        status_code, headers, body = responses.pop(0)
+
+        async def aiter_bytes():
+            for i in range(0, len(body), 32):
+                yield body[i:i + 32]
+
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers
+        response.aiter_bytes = aiter_bytes
+        yield response
+
+    return MagicMock(side_effect=stream)
+
+
+# Required environment variables: None
+class PollTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.rss = RSS("https://example.com/feed")
+        self.watermark = datetime.datetime(2023, 1, 1, 10, tzinfo=pytz.utc)
+
+    async def test_returns_dated_items_newer_than_watermark_oldest_first(self):
+        self.rss.stream = make_stream([(200, {}, RSS_FEED)])
+
+        newest_time, articles = await self.rss.poll(self.watermark)
+
+        self.assertEqual([article.url for article in articles], ["https://example.com/middle",
+                                                                 "https://example.com/new"])
+        self.assertEqual(newest_time, datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc))
+        self.assertEqual(articles[0].origin, "r")
+        self.assertEqual(articles[0].title, "Middle")
+
+    async def test_parses_atom_entries(self):
+        self.rss.stream = make_stream([(200, {}, ATOM_FEED)])
+
+        newest_time, articles = await self.rss.poll(self.watermark)
+
+        self.assertEqual([article.url for article in articles], ["https://example.com/atom"])
+        self.assertEqual(newest_time, datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc))
+
+    async def test_sends_validators_of_last_response_and_skips_unchanged_feed(self):
+        validators = {"ETag": '"v1"', "Last-Modified": "Sun, 01 Jan 2023 12:00:00 GMT"}
+        self.rss.stream = make_stream([(200, validators, RSS_FEED), (304, {}, b"")])
+
+        await self.rss.poll(self.watermark)
+        result = await self.rss.poll(self.watermark)
+
+        self.assertIsNone(result)
+        first, second = self.rss.stream.call_args_list
+        self.assertEqual(first.kwargs["extra_headers"], {})
+        self.assertEqual(second.kwargs["extra_headers"], {"If-None-Match": '"v1"',
+                                                          "If-Modified-Since": "Sun, 01 Jan 2023 12:00:00 GMT"})
+        self.assertEqual(self.rss.etag, '"v1"')
+
+    async def test_truncated_feed_raises_and_keeps_old_validators(self):
+        self.rss.etag = '"v1"'
+        self.rss.stream = make_stream([(200, {"ETag": '"v2"'}, RSS_FEED[:-20])])
+
+        with self.assertRaises(RSSException):
+            await self.rss.poll(self.watermark)
+        self.assertEqual(self.rss.etag, '"v1"')
+
+
+if __name__ == "__main__":
+    unittest.main()
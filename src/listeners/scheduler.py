@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class PollSchedule:
+    def __init__(self, min_interval: float, max_interval: float,
+                 backoff: float = config.POLL_BACKOFF, jitter: float = config.POLL_JITTER,
+                 smoothing: float = config.POLL_RATE_SMOOTHING):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.smoothing = smoothing
+        self.interval = min_interval
+        # Moving average of the seconds between two new articles, None until two polls found articles.
+        self.mean_gap: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+
+    def record(self, n_new_articles: int, now: Optional[float] = None) -> None:
+        # The interval follows the publish rate: a feed is polled about twice per expected article. Only once it has
+        # been quiet for longer than its usual gap does every empty poll stretch the interval up to max_interval.
+        now = time.monotonic() if now is None else now
+        if n_new_articles:
+            if self._last_arrival is not None:
+                gap = (now - self._last_arrival) / n_new_articles
+                self.mean_gap = gap if self.mean_gap is None else (
+                    (1 - self.smoothing) * self.mean_gap + self.smoothing * gap)
+            self._last_arrival = now
+            self.interval = self._rate_interval()
+        elif self._last_arrival is None or now - self._last_arrival > (self.mean_gap or self.min_interval):
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def _rate_interval(self) -> float:
+        if self.mean_gap is None:
+            return self.min_interval
+        return min(self.max_interval, max(self.min_interval, self.mean_gap / 2))
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def wait(self) -> None:
+        delay = self.next_delay()
+        logger.debug(f"Sleeping for {delay:.1f} seconds before the next poll.")
+        await asyncio.sleep(delay)
+
+
+class PollScheduler:
+    def __init__(self):
+        self.schedules: Dict[str, PollSchedule] = {}
+
+    def schedule_for(self, source: str, intervals: Optional[Tuple[float, float]] = None) -> PollSchedule:
+        if source not in self.schedules:
+            if intervals is None:
+                intervals = config.POLL_INTERVALS.get(source, config.DEFAULT_POLL_INTERVAL)
+            min_interval, max_interval = intervals
+            self.schedules[source] = PollSchedule(min_interval, max_interval)
+        return self.schedules[source]
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from typing import List
+
+import src.config as config
+from src.article import Article
+
+
+class SeenUrls:
+    def __init__(self, max_size: int = config.SEEN_URLS_MAX_SIZE):
+        self.max_size = max_size
+        self._urls = OrderedDict()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def add(self, url: str) -> None:
+        self._urls[url] = None
+        self._urls.move_to_end(url)
+        if len(self._urls) > self.max_size:
+            self._urls.popitem(last=False)
+
+    def filter_new(self, articles: List[Article]) -> List[Article]:
+        new_articles = []
+        for article in articles:
+            if article.url in self._urls:
+                self._urls.move_to_end(article.url)
+                continue
+            self.add(article.url)
+            new_articles.append(article)
+        return new_articles
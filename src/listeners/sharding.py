@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+import functools
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from src.article import Article
+from src.listeners.checkpoints import Checkpoint, CheckpointQueue, CheckpointStore
+from src.listeners.leases import LeaseManager
+from src.listeners.news_listener import NewsListener
+from src.listeners.registry import create_source
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+def shard_source_configs(source_configs: List[dict], shards: int) -> List[List[dict]]:
+    shards = max(1, min(shards, len(source_configs)))
+    return [source_configs[i::shards] for i in range(shards)]
+
+
+class QueueCheckpointStore:
+    """Checkpoint store of a worker process.
+
+    Checkpoints are read from the real store, which tolerates concurrent readers, but saving goes through the
+    supervisor so a single process writes them. They are queued after the articles they cover, and the supervisor
+    only saves a checkpoint once the sinks committed those articles.
+    """
+
+    def __init__(self, checkpoints: CheckpointStore, messages: multiprocessing.Queue):
+        self.checkpoints = checkpoints
+        self.messages = messages
+
+    async def load_checkpoint(self, source: str) -> Optional[Checkpoint]:
+        return await self.checkpoints.load_checkpoint(source)
+
+    async def save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str] = None) -> None:
+        await self.send(("checkpoint", source, time, last_id))
+
+    async def send(self, message: tuple) -> None:
+        # The queue is bounded, so a slow supervisor makes the worker wait here instead of piling up messages.
+        await asyncio.get_event_loop().run_in_executor(None, self.messages.put, message)
+
+
+def run_shard(source_configs: List[dict], messages: multiprocessing.Queue,
+              make_checkpoints: Callable[[], CheckpointStore],
+              make_leases: Optional[Callable[[], LeaseManager]] = None) -> None:
+    checkpoints = QueueCheckpointStore(make_checkpoints(), messages)
+    leases = make_leases() if make_leases is not None else None
+
+    async def forward(articles: List[Article]) -> None:
+        await checkpoints.send(("articles", articles))
+
+    news_listener = NewsListener(checkpoints=checkpoints, callback=forward, leases=leases)
+    for source_config in source_configs:
+        news_listener.add_source(create_source(source_config))
+    for store in (checkpoints.checkpoints, leases.store if leases is not None else None):
+        close = getattr(store, "close", None)
+        if close is not None:
+            news_listener.add_shutdown_callback(close)
+    news_listener.start_listeners()
+
+
+class ShardSupervisor:
+    """Runs sources sharded across worker processes and merges their articles into one callback.
+
+    Every worker has its own event loop and HTTP connection pool. Crashed workers are restarted after a delay and
+    resume their sources from the last saved checkpoints. So are all workers once articles fail to commit, their
+    sources have moved past them and only fetch them again from the saved checkpoints.
+    """
+
+    def __init__(self, source_configs: List[dict], processes: int,
+                 callback: Callable[[List[Article]], Awaitable[Any]], checkpoints: CheckpointStore,
+                 make_checkpoints: Callable[[], CheckpointStore],
+                 make_leases: Optional[Callable[[], LeaseManager]] = None,
+                 restart_delay: float = config.WORKER_RESTART_DELAY, queue_size: int = config.SHARD_QUEUE_SIZE):
+        self.shards = shard_source_configs(source_configs, processes)
+        self.callback = callback
+        self.checkpoints = checkpoints
+        self.make_checkpoints = make_checkpoints
+        self.make_leases = make_leases
+        self.restart_delay = restart_delay
+        self.restarts = [0] * len(self.shards)
+        self._checkpoint_queue = CheckpointQueue()
+        self._commits: List[asyncio.Future] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._messages = self._context.Queue(maxsize=queue_size)
+        self._workers: List[Optional[multiprocessing.Process]] = [None] * len(self.shards)
+        self._restart_at: List[Optional[float]] = [None] * len(self.shards)
+
+    def _start_worker(self, shard: int) -> None:
+        worker = self._context.Process(target=run_shard, name=f"shard-{shard}", daemon=True,
+                                       args=(self.shards[shard], self._messages, self.make_checkpoints,
+                                             self.make_leases))
+        worker.start()
+        self._workers[shard] = worker
+        self._restart_at[shard] = None
+        logger.info(f"Started worker {worker.name} (pid {worker.pid}) for {len(self.shards[shard])} sources.")
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for shard, worker in enumerate(self._workers):
+            if self._restart_at[shard] is not None:
+                if now >= self._restart_at[shard]:
+                    self.restarts[shard] += 1
+                    self._start_worker(shard)
+            elif not worker.is_alive():
+                logger.error(f"Worker {worker.name} exited with code {worker.exitcode}. "
+                             f"Restarting in {self.restart_delay} seconds.")
+                self._restart_at[shard] = now + self.restart_delay
+
+    def _get_message(self) -> Any:
+        try:
+            return self._messages.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    async def _handle(self, message: tuple) -> None:
+        if message[0] == "articles":
+            commit = await self.callback(message[1])
+            if asyncio.isfuture(commit):
+                self._commits.append(commit)
+        elif message[0] == "checkpoint":
+            # Workers queue a checkpoint after the articles it covers, so waiting for every commit received since the
+            # previous checkpoint is enough.
+            self._checkpoint_queue.add(self._commits, functools.partial(self.checkpoints.save_checkpoint,
+                                                                        *message[1:]))
+            self._commits = []
+
+    async def wait_for_checkpoints(self) -> None:
+        await self._checkpoint_queue.join()
+
+    async def run(self) -> None:
+        loop = asyncio.get_event_loop()
+        for shard in range(len(self.shards)):
+            self._start_worker(shard)
+        try:
+            while True:
+                message = await loop.run_in_executor(None, self._get_message)
+                if message is not None:
+                    await self._handle(message)
+                if self._checkpoint_queue.failed:
+                    await self._rewind()
+                self._check_workers()
+        finally:
+            self.stop()
+
+    async def _rewind(self) -> None:
+        logger.error("Articles were not committed. Restarting the workers from the saved checkpoints.")
+        self.stop()
+        # Whatever the old workers still queued is fetched again by the new ones, and their checkpoints must not be
+        # saved once checkpoints are saved again.
+        while True:
+            try:
+                self._messages.get_nowait()
+            except queue.Empty:
+                break
+        self._commits = []
+        await self._checkpoint_queue.rewind()
+        for shard in range(len(self.shards)):
+            self.restarts[shard] += 1
+            self._start_worker(shard)
+
+    def stop(self) -> None:
+        for worker in self._workers:
+            if worker is not None and worker.is_alive():
+                worker.terminate()
+        for worker in self._workers:
+            if worker is not None:
+                worker.join()
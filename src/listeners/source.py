@@ -0,0 +1,203 @@
+import asyncio
+import datetime
+import itertools
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Iterable, List, Optional, Tuple
+
+import requests
+
+from src.article import Article, from_epoch_us, to_epoch_us
+from src.listeners.checkpoints import CheckpointStore, get_start_time
+from src.listeners.helpers import get_header_with_random_user_agent, get_async, stream_async
+from src.listeners.json_decoder import decode
+from src.listeners.rate_limiter import rate_limiter, TokenBucket
+from src.listeners.response_cache import response_cache
+from src.listeners.timestamps import count_newer, parse_epoch_us, parse_epochs
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+def last_id_at(articles: List[Article], time: datetime.datetime) -> Optional[str]:
+    """The URL of the newest of the articles published at the given time, they are ordered oldest first."""
+    return next((article.url for article in reversed(articles) if article.time == time), None)
+
+
+class Source:
+    """A news feed polled by NewsListener.
+
+    Subclasses usually only implement fetch_page, parse_items and to_article and name the item field holding the
+    publication time. The default poll pages through a feed ordered newest first until it reaches the watermark.
+    Feeds that work differently override poll.
+    """
+
+    name = ""
+    default_rate_limit = (60, 60, 1)
+    # Item field holding the publication time, as ISO 8601 string, unix seconds or datetime.
+    timestamp_field = ""
+
+    def __init__(self, key: Optional[str] = None, api_key: str = "", rate_limit: Optional[dict] = None,
+                 concurrency: int = 1, poll_interval: Optional[dict] = None, cache_ttl: float = 0):
+        self.key = key if key is not None else self.name
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+        self.poll_interval = None if poll_interval is None else (poll_interval["min"], poll_interval["max"])
+        calls, period, burst = self.default_rate_limit
+        if rate_limit is not None:
+            calls, period, burst = rate_limit["calls"], rate_limit["period"], rate_limit.get("burst", 1)
+        rate_limiter.configure(self.name, calls=calls, period=period, burst=burst, key=self.api_key or self.key)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def __str__(self):
+        return f"{type(self).__name__}(key={self.key})"
+
+    async def fetch_page(self, page: int, watermark: datetime.datetime) -> Any:
+        raise NotImplementedError
+
+    def parse_items(self, data: Any) -> list:
+        raise NotImplementedError
+
+    def epoch_of(self, item: dict) -> int:
+        return parse_epoch_us(item[self.timestamp_field])
+
+    def to_article(self, item: dict, time: datetime.datetime) -> Optional[Article]:
+        raise NotImplementedError
+
+    def is_last_page(self, data: Any, page: int) -> bool:
+        return True
+
+    async def poll(self, watermark: Any) -> Optional[Tuple[Any, List[Article]]]:
+        items = await self.fetch_items(watermark)
+        return self.new_articles(items, watermark)
+
+    async def poll_batches(self, watermark: Any) -> AsyncIterator[Optional[Tuple[Any, List[Article]]]]:
+        yield await self.poll(watermark)
+
+    def page_count(self, data: Any) -> Optional[int]:
+        return None
+
+    def page_window(self) -> int:
+        # More requests in flight than the bucket can serve at once would only queue for tokens.
+        return max(1, min(self.concurrency, int(self._bucket().capacity)))
+
+    async def fetch_items(self, watermark: datetime.datetime) -> list:
+        data = await self.fetch_page(0, watermark)
+        items = self.parse_items(data)
+        if not self._is_past_watermark(items, watermark) or self.is_last_page(data, 0):
+            return items
+        # Later pages are only requested ahead of time if the feed says how many there are, requesting a page past
+        # the end is an error for some APIs.
+        page_count = self.page_count(data)
+        if page_count is None:
+            pages = self.fetch_pages(itertools.count(1), watermark, window=1)
+        else:
+            pages = self.fetch_pages(range(1, page_count), watermark)
+        try:
+            async for page, data in pages:
+                page_items = self.parse_items(data)
+                items.extend(page_items)
+                if not self._is_past_watermark(page_items, watermark) or self.is_last_page(data, page):
+                    break
+        finally:
+            await pages.aclose()
+        return items
+
+    async def fetch_pages(self, pages: Iterable[int], watermark: Any,
+                          window: Optional[int] = None) -> AsyncIterator[Tuple[int, Any]]:
+        """Fetches pages with up to `window` requests in flight and yields them in the given order.
+
+        Requests still in flight are cancelled once the caller stops iterating, so close the generator when done.
+        """
+        window = window if window is not None else self.page_window()
+        pages = iter(pages)
+        in_flight: Deque[Tuple[int, asyncio.Future]] = deque()
+        try:
+            while True:
+                for page in itertools.islice(pages, window - len(in_flight)):
+                    in_flight.append((page, asyncio.ensure_future(self.fetch_page(page, watermark))))
+                if not in_flight:
+                    return
+                page, task = in_flight.popleft()
+                yield page, await task
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+
+    def _is_past_watermark(self, items: list, watermark: datetime.datetime) -> bool:
+        return bool(items) and self.epoch_of(items[-1]) >= to_epoch_us(watermark)
+
+    def new_articles(self, items: list, watermark: datetime.datetime) -> Optional[Tuple[Any, List[Article]]]:
+        # Items are sorted newest first, so the new ones are a prefix found by binary search. Datetimes are only built
+        # for the articles that are returned. Items published at the watermark time are included, NewsListener drops
+        # the ones it delivered already.
+        count = count_newer(items, to_epoch_us(watermark) - 1, self.epoch_of)
+        epochs = parse_epochs(item[self.timestamp_field] for item in items[:count])
+        articles = []
+        for i in reversed(range(count)):
+            article = self.to_article(items[i], from_epoch_us(epochs[i]))
+            if article is not None:
+                articles.append(article)
+        if not articles:
+            return None
+        return max(article.time for article in articles), articles
+
+    async def load_watermark(self, checkpoints: Optional[CheckpointStore]) -> Tuple[Any, List[str]]:
+        """Returns the watermark to resume from and the URLs of the articles at it that were delivered already."""
+        time, last_id = await get_start_time(checkpoints, self.key)
+        return time, [] if last_id is None else [last_id]
+
+    async def save_watermark(self, checkpoints: CheckpointStore, watermark: Any, articles: List[Article]) -> None:
+        await checkpoints.save_checkpoint(self.key, watermark, last_id_at(articles, watermark))
+
+    def _bucket(self) -> TokenBucket:
+        return rate_limiter.bucket(self.name, self.api_key or self.key)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def request(self, url: str, extra_headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        extra_headers = extra_headers or {}
+        if self.cache_ttl:
+            # Fresh cached responses cost neither a request nor a rate limit token.
+            response = response_cache.fresh(url)
+            if response is not None:
+                return response
+        bucket = self._bucket()
+        async with self._get_semaphore():
+            while True:
+                await bucket.acquire()
+                headers = {**get_header_with_random_user_agent(), **extra_headers}
+                response = await get_async(url, cache_ttl=self.cache_ttl, headers=headers, **kwargs)
+                bucket.update_from_headers(response.headers)
+                if response.status_code == 200:
+                    return response
+                logger.error(f"{self} returned status code {response.status_code}. Sleeping for 60 seconds.")
+                bucket.block(60)
+
+    async def request_json(self, url: str, **kwargs) -> Any:
+        response = await self.request(url, **kwargs)
+        return decode(response.content)
+
+    @asynccontextmanager
+    async def stream(self, url: str, extra_headers: Optional[dict] = None, accept: Tuple[int, ...] = (200,),
+                     **kwargs) -> AsyncIterator[requests.Response]:
+        extra_headers = extra_headers or {}
+        bucket = self._bucket()
+        async with self._get_semaphore():
+            while True:
+                await bucket.acquire()
+                headers = {**get_header_with_random_user_agent(), **extra_headers}
+                async with stream_async(url, headers=headers, **kwargs) as response:
+                    bucket.update_from_headers(response.headers)
+                    if response.status_code in accept:
+                        yield response
+                        return
+                logger.error(f"{self} returned status code {response.status_code}. Sleeping for 60 seconds.")
+                bucket.block(60)
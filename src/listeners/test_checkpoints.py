@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+import functools
+import os
+import tempfile
+import unittest
+
+import pytz
+
+from src.listeners.checkpoints import CheckpointQueue, FileCheckpointStore, get_start_time
+
+
+class FileCheckpointStoreTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "checkpoints.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_checkpoints_survive_a_restart(self):
+        time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        await FileCheckpointStore(self.path).save_checkpoint("cnbc", time, "https://example.com/a")
+
+        checkpoint = await FileCheckpointStore(self.path).load_checkpoint("cnbc")
+
+        self.assertEqual(checkpoint, (time, "https://example.com/a"))
+
+    async def test_unknown_source_has_no_checkpoint(self):
+        self.assertIsNone(await FileCheckpointStore(self.path).load_checkpoint("cnbc"))
+
+    async def test_resumes_from_recent_checkpoint(self):
+        store = FileCheckpointStore(self.path)
+        time = datetime.datetime.now(pytz.utc) - datetime.timedelta(hours=1)
+        await store.save_checkpoint("cnbc", time, "a")
+
+        self.assertEqual(await get_start_time(store, "cnbc"), (time, "a"))
+
+    async def test_catch_up_is_bounded(self):
+        store = FileCheckpointStore(self.path)
+        await store.save_checkpoint("cnbc", datetime.datetime(2000, 1, 1, tzinfo=pytz.utc))
+
+        start_time, last_id = await get_start_time(store, "cnbc")
+
+        self.assertGreater(start_time, datetime.datetime.now(pytz.utc) - datetime.timedelta(days=30))
+        self.assertIsNone(last_id)
+
+
+class CheckpointQueueTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_commit_stops_later_checkpoints_until_rewind(self):
+        saved = []
+
+        async def save(watermark):
+            saved.append(watermark)
+
+        failed = asyncio.get_event_loop().create_future()
+        failed.set_exception(ValueError())
+        committed = asyncio.get_event_loop().create_future()
+        committed.set_result(None)
+        checkpoint_queue = CheckpointQueue()
+        checkpoint_queue.add([committed], functools.partial(save, "wm1"))
+        checkpoint_queue.add([failed], functools.partial(save, "wm2"))
+        checkpoint_queue.add([committed], functools.partial(save, "wm3"))
+        await checkpoint_queue.join()
+        self.assertEqual(saved, ["wm1"])
+        self.assertTrue(checkpoint_queue.failed)
+
+        await checkpoint_queue.rewind()
+        checkpoint_queue.add([committed], functools.partial(save, "wm4"))
+        await checkpoint_queue.join()
+
+        self.assertEqual(saved, ["wm1", "wm4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from src.listeners.helpers import get_random_user_agent, user_agents
+from src.listeners.helpers import get_random_user_agent, user_agents, get_client, close_client
 
 
 class RandomUserAgentTestCase(unittest.TestCase):
@@ -12,3 +12,21 @@ class RandomUserAgentTestCase(unittest.TestCase):
     def test_returns_string_user_agent(self):
         user_agent = get_random_user_agent()
         self.assertIsInstance(user_agent, str)
+
+
+class SharedClientTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await close_client()
+
+    async def test_client_is_reused(self):
+        self.assertIs(get_client(), get_client())
+
+    async def test_new_client_after_close(self):
+        client = get_client()
+        await close_client()
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(get_client(), client)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from unittest.mock import patch
+
+import src.listeners.json_decoder as json_decoder
+from src.listeners.json_decoder import decode
+
+
+class DecodeTestCase(unittest.TestCase):
+    def tearDown(self):
+        json_decoder.set_decoder(None)
+
+    def test_returns_the_whole_document(self):
+        content = b'{"response": {"pages": 3, "results": [{"webUrl": "a", "body": "long"}]}}'
+
+        self.assertEqual(decode(content), {"response": {"pages": 3, "results": [{"webUrl": "a", "body": "long"}]}})
+
+    def test_falls_back_to_json_when_backend_is_missing(self):
+        with patch.object(json_decoder.config, "JSON_BACKEND", "missing"):
+            json_decoder.set_decoder(None)
+            self.assertIs(json_decoder.get_decoder(), json_decoder.json.loads)
+
+    def test_backends_agree(self):
+        content = b'{"results": [{"url": "a", "title": "\\u00e9t\\u00e9", "n": 1.5}]}'
+        results = []
+        for decoder in json_decoder.decoders.values():
+            json_decoder.set_decoder(decoder)
+            results.append(decode(content))
+
+        self.assertTrue(all(result == results[0] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
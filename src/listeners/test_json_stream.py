@@ -0,0 +1,40 @@
+import json
+import unittest
+
+from src.listeners.json_stream import iter_json_array
+
+
+async def chunked(text: str, size: int):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+async def collect(text: str, size: int, key: str, fields=None) -> list:
+    return [item async for item in iter_json_array(chunked(text, size), key, fields)]
+
+
+class IterJsonArrayTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.docs = [{"web_url": f"https://nytimes.com/{i}", "pub_date": "2023-01-01T00:00:00+0000",
+                      "subsection_name": "Europe", "multimedia": [{"url": "x" * 50}] * 3} for i in range(20)]
+        self.text = json.dumps({"copyright": "NYT", "response": {"docs": self.docs, "meta": {"hits": 20}}})
+
+    async def test_yields_every_item_for_any_chunk_size(self):
+        for size in (1, 7, 64, len(self.text)):
+            self.assertEqual(await collect(self.text, size, "docs"), self.docs)
+
+    async def test_projects_fields(self):
+        items = await collect(self.text, 100, "docs", ["web_url", "pub_date"])
+
+        self.assertEqual(items[0], {"web_url": "https://nytimes.com/0", "pub_date": "2023-01-01T00:00:00+0000"})
+
+    async def test_empty_array(self):
+        self.assertEqual(await collect('{"response": {"docs" : [ ]}}', 3, "docs"), [])
+
+    async def test_truncated_document_raises(self):
+        with self.assertRaises(ValueError):
+            await collect(self.text[:len(self.text) // 2], 50, "docs")
+
+
+if __name__ == "__main__":
+    unittest.main()
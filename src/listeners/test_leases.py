@@ -0,0 +1,73 @@
+import time
+import unittest
+
+from src.listeners.leases import LeaseManager
+
+
+class MemoryLeaseStore:
+    def __init__(self):
+        self.leases = {}
+        self.fail = False
+
+    async def acquire_lease(self, name, owner, ttl):
+        if self.fail:
+            raise ConnectionError()
+        now = time.monotonic()
+        current = self.leases.get(name)
+        if current is None or current[0] == owner or current[1] < now:
+            self.leases[name] = (owner, now + ttl)
+        return self.leases[name][0] == owner
+
+    async def release_lease(self, name, owner):
+        if self.leases.get(name, (None,))[0] == owner:
+            del self.leases[name]
+
+
+class LeaseManagerTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = MemoryLeaseStore()
+        self.first = LeaseManager(self.store, "first", ttl=60)
+        self.second = LeaseManager(self.store, "second", ttl=60)
+        for leases in (self.first, self.second):
+            leases.add("cnbc")
+            leases.add("guardian")
+
+    async def test_each_source_is_held_by_one_replica(self):
+        await self.first.renew()
+        await self.second.renew()
+
+        self.assertTrue(self.first.holds("cnbc") and self.first.holds("guardian"))
+        self.assertFalse(self.second.holds("cnbc") or self.second.holds("guardian"))
+
+    async def test_expired_lease_fails_over(self):
+        self.first.ttl = 0
+        await self.first.renew()
+        await self.second.renew()
+
+        self.assertFalse(self.first.holds("cnbc"))
+        self.assertTrue(self.second.holds("cnbc"))
+
+    async def test_released_lease_is_taken_over_immediately(self):
+        await self.first.renew()
+        await self.first.release_all()
+        await self.second.renew()
+
+        self.assertFalse(self.first.holds("cnbc"))
+        self.assertTrue(self.second.holds("cnbc"))
+
+    async def test_unreachable_store_drops_all_leases(self):
+        await self.first.renew()
+        self.store.fail = True
+        await self.first.renew()
+
+        self.assertFalse(self.first.holds("cnbc"))
+
+    async def test_lease_counts_as_lost_once_ttl_passed_without_renewal(self):
+        await self.first.renew()
+        self.first.ttl = 0
+
+        self.assertFalse(self.first.holds("cnbc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import unittest
+
+import pytz
+
+from src.article import Article
+from src.listeners.checkpoints import FileCheckpointStore
+from src.listeners.leases import LeaseManager
+from src.listeners.news_listener import NewsListener
+from src.listeners.source import Source
+from src.listeners.test_leases import MemoryLeaseStore
+
+
+class ScriptedSource(Source):
+    name = "scripted"
+
+    def __init__(self, results: list):
+        super().__init__(poll_interval={"min": 0.001, "max": 0.001})
+        self.results = results
+        self.watermarks = []
+
+    async def poll(self, watermark):
+        self.watermarks.append(watermark)
+        if not self.results:
+            return None
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class ListenToSourceTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoints = FileCheckpointStore(os.path.join(self.directory.name, "checkpoints.json"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_delivers_new_articles_once_and_advances_watermark(self):
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        article = Article("a", time, "c")
+        source = ScriptedSource([ValueError(), (time, [article]), None, (time, [article])])
+        batches = []
+
+        async def callback(articles):
+            batches.append(articles)
+
+        checkpoints = self.checkpoints
+        news_listener = NewsListener(checkpoints=checkpoints, callback=callback)
+        task = asyncio.ensure_future(news_listener.listen_to_source(source))
+        while source.results:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await news_listener.wait_for_checkpoints()
+
+        self.assertEqual(batches, [[article]])
+        self.assertEqual(source.watermarks[-1], time)
+        self.assertEqual(await checkpoints.load_checkpoint("scripted"), (time, "a"))
+
+    async def test_checkpoint_waits_for_commit(self):
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        source = ScriptedSource([(time, [Article("a", time, "c")])])
+        commit = asyncio.get_event_loop().create_future()
+
+        async def callback(articles):
+            return commit
+
+        checkpoints = self.checkpoints
+        news_listener = NewsListener(checkpoints=checkpoints, callback=callback)
+        task = asyncio.ensure_future(news_listener.listen_to_source(source))
+        while source.results:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        self.assertIsNone(await checkpoints.load_checkpoint("scripted"))
+
+        commit.set_result(None)
+        await news_listener.wait_for_checkpoints()
+        task.cancel()
+
+        self.assertEqual(await checkpoints.load_checkpoint("scripted"), (time, "a"))
+
+    async def test_article_in_same_second_as_watermark_is_delivered_once(self):
+        time = datetime.datetime.now(pytz.utc).replace(microsecond=0)
+        first, second = Article("a", time, "c"), Article("b", time, "c")
+        batches = []
+
+        async def callback(articles):
+            batches.append(articles)
+
+        source = ScriptedSource([(time, [first]), (time, [first, second])])
+        news_listener = NewsListener(checkpoints=self.checkpoints, callback=callback)
+        task = asyncio.ensure_future(news_listener.listen_to_source(source))
+        while source.results:
+            await asyncio.sleep(0.01)
+        await news_listener.wait_for_checkpoints()
+        task.cancel()
+
+        # After a restart the checkpoint's id keeps the article at the watermark from being delivered again.
+        restarted = ScriptedSource([(time, [second])])
+        news_listener = NewsListener(checkpoints=self.checkpoints, callback=callback)
+        task = asyncio.ensure_future(news_listener.listen_to_source(restarted))
+        while restarted.results:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        self.assertEqual(batches, [[first], [second]])
+        self.assertEqual(await self.checkpoints.load_checkpoint("scripted"), (time, "b"))
+
+    async def test_failed_commit_rewinds_to_saved_checkpoint(self):
+        start = datetime.datetime.now(pytz.utc) - datetime.timedelta(hours=1)
+        await self.checkpoints.save_checkpoint("scripted", start)
+        times = [start + datetime.timedelta(minutes=minutes) for minutes in range(3)]
+        source = ScriptedSource([(times[1], [Article("a", times[1], "c")]),
+                                 (times[2], [Article("b", times[2], "c")]),
+                                 (times[2], [Article("a", times[1], "c"), Article("b", times[2], "c")])])
+        commits = [ValueError(), None, None, None]
+        batches = []
+
+        async def callback(articles):
+            batches.append([article.url for article in articles])
+            commit = asyncio.get_event_loop().create_future()
+            result = commits.pop(0)
+            if isinstance(result, Exception):
+                commit.set_exception(result)
+            else:
+                commit.set_result(result)
+            return commit
+
+        news_listener = NewsListener(checkpoints=self.checkpoints, callback=callback)
+        task = asyncio.ensure_future(news_listener.listen_to_source(source))
+        while source.results:
+            await asyncio.sleep(0.01)
+        await news_listener.wait_for_checkpoints()
+        task.cancel()
+
+        # Whether the rewind comes before or after the second poll, "a" is polled for and delivered again.
+        self.assertEqual(source.watermarks.count(start), 2)
+        self.assertEqual(sum(batch.count("a") for batch in batches), 2)
+        self.assertEqual((await self.checkpoints.load_checkpoint("scripted"))[0], times[2])
+
+    async def test_only_polls_sources_whose_lease_it_holds(self):
+        store = MemoryLeaseStore()
+        store.leases["scripted"] = ("other", float("inf"))
+        leases = LeaseManager(store, "self", renew_interval=0.001)
+        source = ScriptedSource([None])
+
+        async def callback(articles):
+            pass
+
+        news_listener = NewsListener(callback=callback, leases=leases)
+        leases.add(source.key)
+        await leases.renew()
+        task = asyncio.ensure_future(news_listener.listen_to_source(source))
+        await asyncio.sleep(0.05)
+        self.assertEqual(source.watermarks, [])
+
+        del store.leases["scripted"]
+        await leases.renew()
+        while source.results:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        self.assertTrue(source.watermarks)
+
+    def test_source_needs_pipeline_or_callback(self):
+        news_listener = NewsListener()
+
+        with self.assertRaises(ValueError):
+            news_listener.add_source(ScriptedSource([]))
+
+
+class ShutdownTestCase(unittest.TestCase):
+    def test_failing_shutdown_callback_does_not_skip_the_others(self):
+        closed = []
+
+        async def failing_close():
+            raise ConnectionError()
+
+        async def close():
+            closed.append(True)
+
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        news_listener = NewsListener()
+        news_listener.add_shutdown_callback(failing_close)
+        news_listener.add_shutdown_callback(close)
+        try:
+            news_listener.start_listeners()
+        finally:
+            news_listener.loop.close()
+            asyncio.set_event_loop(None)
+
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
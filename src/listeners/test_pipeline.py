@@ -0,0 +1,182 @@
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import pytz
+
+from src.article import Article
+from src.listeners.pipeline import ArticlePipeline, PipelineFullError
+
+
+class ArticlePipelineTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_delivers_batches_to_async_and_blocking_sinks(self):
+        async_received = []
+        blocking_threads = []
+
+        async def async_sink(articles):
+            async_received.extend(articles)
+
+        def blocking_sink(articles):
+            blocking_threads.append(threading.current_thread())
+
+        pipeline = ArticlePipeline([async_sink, blocking_sink], workers=2)
+        pipeline.start()
+        await pipeline.put([Article("a", None, "c"), Article("b", None, "c")])
+        await pipeline.put([Article("c", None, "g")])
+        await pipeline.stop()
+
+        self.assertEqual([article.url for article in async_received], ["a", "b", "c"])
+        self.assertEqual(len(blocking_threads), 2)
+        self.assertNotIn(threading.main_thread(), blocking_threads)
+        self.assertEqual(pipeline.metrics.processed, 2)
+
+    async def test_failing_sink_is_counted_and_does_not_stop_workers(self):
+        def failing_sink(articles):
+            raise ValueError()
+
+        pipeline = ArticlePipeline([failing_sink], workers=1)
+        pipeline.start()
+        await pipeline.put([Article("a", None, "c")])
+        await pipeline.put([Article("b", None, "c")])
+        await pipeline.stop()
+
+        self.assertEqual(pipeline.metrics.failed, 2)
+
+    async def test_full_queue_is_recorded(self):
+        release = asyncio.Event()
+
+        async def slow_sink(articles):
+            await release.wait()
+
+        pipeline = ArticlePipeline([slow_sink], max_size=1, workers=1)
+        pipeline.start()
+        await pipeline.put([Article("a", None, "c")])
+        await asyncio.sleep(0)
+        await pipeline.put([Article("b", None, "c")])
+        put = asyncio.ensure_future(pipeline.put([Article("c", None, "c")]))
+        await asyncio.sleep(0)
+        release.set()
+        await put
+        await pipeline.stop()
+
+        self.assertEqual(pipeline.metrics.full_events, 1)
+        self.assertEqual(pipeline.metrics.processed, 3)
+
+    async def test_batch_that_cannot_be_queued_in_time_is_spilled(self):
+        release = asyncio.Event()
+
+        async def stuck_sink(articles):
+            await release.wait()
+
+        with tempfile.TemporaryDirectory() as directory:
+            spill_path = os.path.join(directory, "spill.jsonl")
+            pipeline = ArticlePipeline([stuck_sink], max_size=1, workers=1, put_timeout=0.01, spill_path=spill_path)
+            pipeline.start()
+            await pipeline.put([Article("a", None, "c")])
+            await asyncio.sleep(0)
+            await pipeline.put([Article("b", None, "c")])
+            spilled = await pipeline.put([Article("c", None, "c", title="t")])
+            self.assertTrue(spilled.done())
+            release.set()
+            await pipeline.stop()
+
+            with open(spill_path) as file:
+                rows = [json.loads(line) for line in file]
+
+        self.assertEqual(pipeline.metrics.spilled, 1)
+        self.assertEqual(pipeline.metrics.submitted, 2)
+        self.assertEqual(rows[0][0]["url"], "c")
+        self.assertEqual(rows[0][0]["title"], "t")
+
+    async def test_spilled_batches_are_replayed_on_start(self):
+        received = []
+
+        async def sink(articles):
+            received.extend(articles)
+
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        with tempfile.TemporaryDirectory() as directory:
+            spill_path = os.path.join(directory, "spill.jsonl")
+            spilling = ArticlePipeline([sink], spill_path=spill_path)
+            spilling._spill([Article("a", time, "c", title="t")])
+            spilling._spill([Article("b", None, "c")])
+
+            pipeline = ArticlePipeline([sink], workers=1, spill_path=spill_path)
+            pipeline.start()
+            await pipeline.replay_spill()
+            await pipeline.stop()
+
+            self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(received, [Article("a", time, "c", title="t"), Article("b", None, "c")])
+
+    async def test_spilled_batches_are_kept_until_committed(self):
+        def failing_sink(articles):
+            raise ValueError()
+
+        with tempfile.TemporaryDirectory() as directory:
+            spill_path = os.path.join(directory, "spill.jsonl")
+            pipeline = ArticlePipeline([failing_sink], workers=1, spill_path=spill_path)
+            pipeline._spill([Article("a", None, "c")])
+            pipeline.start()
+            await pipeline.replay_spill()
+            await pipeline.stop()
+
+            self.assertEqual(os.listdir(directory), ["spill.jsonl.replay"])
+
+    async def test_batch_is_dropped_without_spill_path(self):
+        release = asyncio.Event()
+
+        async def stuck_sink(articles):
+            await release.wait()
+
+        pipeline = ArticlePipeline([stuck_sink], max_size=1, workers=1, put_timeout=0.01, spill_path="")
+        pipeline.start()
+        await pipeline.put([Article("a", None, "c")])
+        await asyncio.sleep(0)
+        await pipeline.put([Article("b", None, "c")])
+        dropped = await pipeline.put([Article("c", None, "c")])
+        release.set()
+        await pipeline.stop()
+
+        with self.assertRaises(PipelineFullError):
+            await dropped
+        self.assertEqual(pipeline.metrics.dropped, 1)
+
+    async def test_batch_is_committed_once_buffering_sink_commits(self):
+        buffered = asyncio.get_event_loop().create_future()
+
+        async def buffering_sink(articles):
+            return buffered
+
+        pipeline = ArticlePipeline([buffering_sink], workers=1)
+        pipeline.start()
+        commit = await pipeline.put([Article("a", None, "c")])
+        await asyncio.sleep(0.01)
+        self.assertFalse(commit.done())
+        self.assertEqual(pipeline.metrics.processed, 0)
+
+        buffered.set_result(None)
+        await commit
+        await pipeline.stop()
+
+        self.assertEqual(pipeline.metrics.processed, 1)
+
+    async def test_failing_commit_fails_the_batch(self):
+        def failing_sink(articles):
+            raise ValueError()
+
+        pipeline = ArticlePipeline([failing_sink], workers=1)
+        pipeline.start()
+        commit = await pipeline.put([Article("a", None, "c")])
+        await pipeline.stop()
+
+        with self.assertRaises(ValueError):
+            await commit
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from src.listeners.rate_limiter import TokenBucket, RateLimiter
+
+
+class TokenBucketTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_is_served_immediately(self):
+        bucket = TokenBucket(calls=1, period=60, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    async def test_waits_for_refill_after_burst(self):
+        bucket = TokenBucket(calls=20, period=1, burst=1)
+        await bucket.acquire()
+        start = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    async def test_waiters_are_served_in_order(self):
+        bucket = TokenBucket(calls=50, period=1, burst=1)
+        order = []
+
+        async def worker(i):
+            await bucket.acquire()
+            order.append(i)
+
+        await asyncio.gather(*(worker(i) for i in range(5)))
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+
+    async def test_block_delays_next_acquire(self):
+        bucket = TokenBucket(calls=1000, period=1, burst=5)
+        bucket.block(0.1)
+        start = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_update_from_headers(self):
+        bucket = TokenBucket(calls=10, period=60, burst=5)
+        bucket.update_from_headers(httpx.Headers({"X-RateLimit-Limit-minute": "30",
+                                                  "X-RateLimit-Remaining-minute": "2"}))
+        self.assertAlmostEqual(bucket.rate, 0.5)
+        self.assertLessEqual(bucket._tokens, 2)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_buckets_are_per_source_and_key(self):
+        limiter = RateLimiter()
+        limiter.configure("source", calls=10, period=60, key="a")
+        limiter.configure("source", calls=10, period=60, key="b")
+        self.assertIs(limiter.bucket("source", "a"), limiter.bucket("source", "a"))
+        self.assertIsNot(limiter.bucket("source", "a"), limiter.bucket("source", "b"))
+
+    def test_limits_are_per_key(self):
+        limiter = RateLimiter()
+        limiter.configure("source", calls=10, period=60, key="a")
+        limiter.configure("source", calls=60, period=60, key="b")
+        self.assertAlmostEqual(limiter.bucket("source", "a").rate, 10 / 60)
+        self.assertAlmostEqual(limiter.bucket("source", "b").rate, 1)
+
+    def test_configure_updates_existing_buckets(self):
+        limiter = RateLimiter()
+        limiter.configure("source", calls=10, period=60)
+        bucket = limiter.bucket("source")
+        limiter.configure("source", calls=60, period=60)
+        self.assertAlmostEqual(bucket.rate, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
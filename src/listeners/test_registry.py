@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.listeners.cnbc.cnbc import CNBC
+from src.listeners.guardian.guardian import Guardian
+from src.listeners.registry import create_source, load_sources, register
+from src.listeners.source import Source
+
+
+@register("test-source")
+class RegisteredSource(Source):
+    def __init__(self, feed: str, **kwargs):
+        super().__init__(**kwargs)
+        self.feed = feed
+
+
+class RegistryTestCase(unittest.TestCase):
+    def test_creates_registered_source_with_options(self):
+        source = create_source({"type": "test-source", "feed": "a", "key": "test-source:a",
+                                "poll_interval": {"min": 1, "max": 2}})
+
+        self.assertIsInstance(source, RegisteredSource)
+        self.assertEqual(source.feed, "a")
+        self.assertEqual(source.key, "test-source:a")
+        self.assertEqual(source.poll_interval, (1, 2))
+
+    def test_loads_only_enabled_sources(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sources.json")
+            with open(path, "w") as file:
+                json.dump({"sources": [{"type": "cnbc"},
+                                       {"type": "guardian", "sections": ["world", "politics"]},
+                                       {"type": "nyt", "enabled": False}]}, file)
+
+            sources = load_sources(path)
+
+        self.assertEqual([type(source) for source in sources], [CNBC, Guardian])
+        self.assertEqual(sources[1].sections, ["world", "politics"])
+
+    def test_shipped_config_is_valid(self):
+        self.assertTrue(load_sources())
+
+
+if __name__ == "__main__":
+    unittest.main()
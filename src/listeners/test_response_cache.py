@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+import src.listeners.helpers as helpers
+from src.listeners.helpers import get_async
+from src.listeners.response_cache import ResponseCache
+
+
+def make_response(content: bytes, **headers) -> httpx.Response:
+    return httpx.Response(200, headers=headers, content=content, request=httpx.Request("GET", "https://example.com"))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used_entries_beyond_max_bytes(self):
+        cache = ResponseCache(max_bytes=30)
+        cache.put("a", make_response(b"x" * 10), 60)
+        cache.put("b", make_response(b"x" * 10), 60)
+        cache.get("a")
+        cache.put("c", make_response(b"x" * 10), 60)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertLessEqual(cache.size, 30)
+
+    def test_skips_responses_larger_than_the_cache(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.put("a", make_response(b"x" * 100), 60)
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_expired_entries_are_not_fresh_but_kept_for_revalidation(self):
+        cache = ResponseCache()
+        cache.put("a", make_response(b"{}", etag='"v1"'), 0)
+
+        self.assertIsNone(cache.fresh("a"))
+        self.assertEqual(cache.get("a").validators(), {"If-None-Match": '"v1"'})
+
+
+class CachedGetTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.cache = ResponseCache()
+        patcher = patch.object(helpers, "response_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    async def asyncTearDown(self):
+        await helpers.close_client()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"', "X-RateLimit-Remaining-Minute": "7"})
+        return httpx.Response(200, json={"page": 1}, headers={"ETag": '"v1"', "X-RateLimit-Remaining-Minute": "8"})
+
+    async def test_serves_fresh_responses_without_a_request(self):
+        first = await get_async("https://example.com/a", cache_ttl=60)
+        second = await get_async("https://example.com/a", cache_ttl=60)
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(second.json(), first.json())
+
+    async def test_revalidates_expired_responses_with_their_etag(self):
+        await get_async("https://example.com/a", cache_ttl=60)
+        self.cache.get("https://example.com/a").expires_at = 0
+
+        response = await get_async("https://example.com/a", cache_ttl=60, headers={"User-Agent": "test"})
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[1].headers["User-Agent"], "test")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"page": 1})
+        self.assertEqual(response.headers["X-RateLimit-Remaining-Minute"], "7")
+
+    async def test_does_not_cache_without_ttl(self):
+        await get_async("https://example.com/a")
+        await get_async("https://example.com/a")
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
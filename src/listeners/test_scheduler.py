@@ -0,0 +1,54 @@
+import unittest
+
+from src.listeners.scheduler import PollSchedule, PollScheduler
+
+
+class PollScheduleTestCase(unittest.TestCase):
+    def test_backs_off_exponentially_when_idle(self):
+        schedule = PollSchedule(min_interval=1, max_interval=5, backoff=2)
+        intervals = []
+        for _ in range(4):
+            schedule.record(0)
+            intervals.append(schedule.interval)
+        self.assertEqual(intervals, [2, 4, 5, 5])
+
+    def test_tightens_when_articles_arrive(self):
+        schedule = PollSchedule(min_interval=1, max_interval=60)
+        for _ in range(5):
+            schedule.record(0)
+        schedule.record(3)
+        self.assertEqual(schedule.interval, 1)
+
+    def test_interval_follows_publish_rate(self):
+        schedule = PollSchedule(min_interval=1, max_interval=600, smoothing=1)
+        schedule.record(1, now=0)
+        schedule.record(2, now=120)
+
+        self.assertEqual(schedule.mean_gap, 60)
+        self.assertEqual(schedule.interval, 30)
+
+    def test_keeps_interval_while_quiet_for_less_than_usual_gap(self):
+        schedule = PollSchedule(min_interval=1, max_interval=600, backoff=2, smoothing=1)
+        schedule.record(1, now=0)
+        schedule.record(1, now=60)
+        schedule.record(0, now=90)
+        self.assertEqual(schedule.interval, 30)
+
+        schedule.record(0, now=150)
+        self.assertEqual(schedule.interval, 60)
+
+    def test_jitter_stays_within_bounds(self):
+        schedule = PollSchedule(min_interval=10, max_interval=60, jitter=0.2)
+        for _ in range(100):
+            self.assertTrue(8 <= schedule.next_delay() <= 12)
+
+
+class PollSchedulerTestCase(unittest.TestCase):
+    def test_one_schedule_per_source(self):
+        scheduler = PollScheduler()
+        self.assertIs(scheduler.schedule_for("cnbc"), scheduler.schedule_for("cnbc"))
+        self.assertIsNot(scheduler.schedule_for("cnbc"), scheduler.schedule_for("guardian"))
+
+
+if __name__ == "__main__":
+    unittest.main()
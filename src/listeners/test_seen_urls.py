@@ -0,0 +1,29 @@
+import unittest
+
+from src.article import Article
+from src.listeners.seen_urls import SeenUrls
+
+
+class SeenUrlsTestCase(unittest.TestCase):
+    def test_filters_already_seen_articles(self):
+        seen = SeenUrls()
+        self.assertEqual(len(seen.filter_new([Article("a", None, "c"), Article("b", None, "c")])), 2)
+
+        new_articles = seen.filter_new([Article("b", None, "c"), Article("c", None, "c")])
+
+        self.assertEqual([article.url for article in new_articles], ["c"])
+
+    def test_evicts_least_recently_seen_url(self):
+        seen = SeenUrls(max_size=2)
+        seen.add("a")
+        seen.add("b")
+        seen.filter_new([Article("a", None, "c")])
+        seen.add("c")
+
+        self.assertIn("a", seen)
+        self.assertNotIn("b", seen)
+        self.assertEqual(len(seen), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import datetime
+import functools
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytz
+
+from src.article import Article
+from src.listeners.checkpoints import FileCheckpointStore
+from src.listeners.registry import register
+from src.listeners.sharding import ShardSupervisor, shard_source_configs
+from src.listeners.source import Source
+
+
+@register("test-sharded")
+class CrashOnceSource(Source):
+    """Kills its worker process on the first poll and then returns one article per poll."""
+
+    def __init__(self, crash_file: str, **kwargs):
+        super().__init__(poll_interval={"min": 0.01, "max": 0.01}, **kwargs)
+        self.crash_file = crash_file
+
+    async def poll(self, watermark):
+        if not os.path.exists(self.crash_file):
+            open(self.crash_file, "w").close()
+            os._exit(1)
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        return time, [Article(f"https://example.com/{self.key}", time, "t")]
+
+
+class ShardSourceConfigsTestCase(unittest.TestCase):
+    def test_spreads_sources_round_robin(self):
+        configs = [{"key": str(i)} for i in range(5)]
+
+        self.assertEqual(shard_source_configs(configs, 2), [configs[0::2], configs[1::2]])
+
+    def test_never_starts_idle_shards(self):
+        self.assertEqual(len(shard_source_configs([{}, {}], 8)), 2)
+
+
+class ShardSupervisorTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_restarts_crashed_workers_and_merges_their_articles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_configs = [{"type": "test-sharded", "module": __name__, "key": key,
+                               "crash_file": os.path.join(directory, key)} for key in ("a", "b")]
+            checkpoints = FileCheckpointStore(os.path.join(directory, "checkpoints.json"))
+            urls = set()
+
+            async def callback(articles):
+                urls.update(article.url for article in articles)
+
+            supervisor = ShardSupervisor(source_configs, 2, callback, checkpoints,
+                                         functools.partial(FileCheckpointStore, checkpoints.path), restart_delay=0)
+            task = asyncio.ensure_future(supervisor.run())
+            for _ in range(600):
+                if len(urls) == 2 and await checkpoints.load_checkpoint("b") is not None:
+                    break
+                await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        self.assertEqual(urls, {"https://example.com/a", "https://example.com/b"})
+        self.assertEqual(supervisor.restarts, [1, 1])
+        self.assertIsNotNone(await checkpoints.load_checkpoint("a"))
+
+    async def test_failed_commit_restarts_workers_without_saving_later_checkpoints(self):
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        checkpoints = MagicMock()
+        checkpoints.save_checkpoint = AsyncMock()
+
+        async def callback(articles):
+            commit = asyncio.get_event_loop().create_future()
+            commit.set_exception(ValueError())
+            return commit
+
+        supervisor = ShardSupervisor([{"key": "a"}, {"key": "b"}], 2, callback, checkpoints, MagicMock())
+        await supervisor._handle(("articles", [Article("a", time, "t")]))
+        await supervisor._handle(("checkpoint", "a", time, "a"))
+        await supervisor.wait_for_checkpoints()
+        self.assertTrue(supervisor._checkpoint_queue.failed)
+
+        supervisor._messages.put(("checkpoint", "b", time, None))
+        await asyncio.sleep(0.1)
+        with patch.object(supervisor, "stop") as stop, patch.object(supervisor, "_start_worker") as start_worker:
+            await supervisor._rewind()
+
+        stop.assert_called_once()
+        self.assertEqual(start_worker.call_count, 2)
+        self.assertFalse(supervisor._checkpoint_queue.failed)
+        self.assertIsNone(supervisor._get_message())
+        checkpoints.save_checkpoint.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
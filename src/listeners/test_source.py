@@ -0,0 +1,91 @@
+import asyncio
+import datetime
+import unittest
+
+import pytz
+
+from src.article import Article
+from src.listeners.source import Source
+
+
+class PagedSource(Source):
+    """Ten pages of ten items, one item per second, newest first. Page requests take `delay(page)` seconds."""
+
+    name = "paged"
+    timestamp_field = "time"
+
+    def __init__(self, delay=lambda page: 0.01 * (10 - page), **kwargs):
+        super().__init__(rate_limit={"calls": 600, "period": 60, "burst": 4}, **kwargs)
+        self.delay = delay
+        self.requested = []
+        self.cancelled = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch_page(self, page, watermark):
+        self.requested.append(page)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay(page))
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        finally:
+            self.in_flight -= 1
+        return {"pages": 10, "items": [{"time": 1000 - page * 10 - i} for i in range(10)]}
+
+    def parse_items(self, data):
+        return data["items"]
+
+    def page_count(self, data):
+        return data["pages"]
+
+    def is_last_page(self, data, page):
+        return page + 1 >= data["pages"]
+
+    def to_article(self, item, time):
+        return Article(str(item["time"]), time, "p")
+
+
+class FetchItemsTestCase(unittest.IsolatedAsyncioTestCase):
+    async def fetch_items(self, source: Source, pubdate: int) -> list:
+        return await source.fetch_items(datetime.datetime.fromtimestamp(pubdate, tz=pytz.utc))
+
+    async def test_fetches_pages_concurrently_and_keeps_their_order(self):
+        source = PagedSource(concurrency=4)
+
+        items = await self.fetch_items(source, 0)
+
+        self.assertEqual([item["time"] for item in items], list(range(1000, 900, -1)))
+        self.assertEqual(source.max_in_flight, 4)
+
+    async def test_cancels_requests_past_the_watermark_page(self):
+        source = PagedSource(delay=lambda page: 0.05 * page, concurrency=4)
+
+        items = await self.fetch_items(source, 965)
+
+        self.assertEqual(len(items), 40)
+        self.assertIn(4, source.cancelled)
+        self.assertEqual(sorted(source.cancelled), [page for page in source.requested if page > 3])
+        self.assertEqual(source.in_flight, 0)
+
+    async def test_concurrency_is_bounded_by_the_burst(self):
+        source = PagedSource(concurrency=8)
+
+        await self.fetch_items(source, 0)
+
+        self.assertEqual(source.max_in_flight, 4)
+
+    async def test_pages_one_at_a_time_without_page_count(self):
+        source = PagedSource(concurrency=4)
+        source.page_count = lambda data: None
+
+        await self.fetch_items(source, 965)
+
+        self.assertEqual(source.requested, [0, 1, 2, 3])
+        self.assertEqual(source.max_in_flight, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
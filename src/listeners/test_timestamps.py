@@ -0,0 +1,44 @@
+import datetime
+import unittest
+
+import pytz
+
+from src.article import from_epoch_us
+from src.listeners.timestamps import count_newer, parse_epoch_us, parse_epochs
+
+
+class ParseEpochsTestCase(unittest.TestCase):
+    def test_iso_strings_unix_seconds_and_datetimes_agree(self):
+        time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+
+        epochs = parse_epochs(["2023-01-01T12:00:00Z", "2023-01-01T07:00:00-05:00", 1672574400, time])
+
+        self.assertEqual(set(epochs), {1672574400000000})
+        self.assertEqual(from_epoch_us(epochs[0]), time)
+
+    def test_keeps_microseconds(self):
+        self.assertEqual(parse_epoch_us("2023-01-01T12:00:00.000123Z") % 1000000, 123)
+
+
+class CountNewerTestCase(unittest.TestCase):
+    def test_counts_prefix_newer_than_watermark(self):
+        epochs = [50, 40, 30, 30, 20]
+
+        self.assertEqual(count_newer(epochs, 30), 2)
+        self.assertEqual(count_newer(epochs, 60), 0)
+        self.assertEqual(count_newer(epochs, 10), 5)
+        self.assertEqual(count_newer([], 10), 0)
+
+    def test_only_looks_at_a_logarithmic_number_of_items(self):
+        looked_at = []
+
+        def epoch_of(item):
+            looked_at.append(item)
+            return item
+
+        self.assertEqual(count_newer(list(range(1000, 0, -1)), 500, epoch_of), 500)
+        self.assertLessEqual(len(looked_at), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import datetime
+from array import array
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+
+import ciso8601
+import pytz
+
+from src.article import to_epoch_us
+
+GMT = pytz.timezone("GMT")
+
+Timestamp = Union[str, int, float, datetime.datetime]
+
+
+def parse_epoch_us(value: Timestamp) -> int:
+    """Turns an ISO 8601 string, unix seconds or an aware datetime into UTC epoch microseconds."""
+    if isinstance(value, str):
+        value = ciso8601.parse_datetime(value)
+    if isinstance(value, datetime.datetime):
+        return to_epoch_us(value)
+    return int(value * 1000000)
+
+
+def parse_epochs(values: Iterable[Timestamp]) -> array:
+    return array("q", map(parse_epoch_us, values))
+
+
+def count_newer(items: Sequence, watermark_us: int, epoch_of: Optional[Callable[[Any], int]] = None) -> int:
+    """Returns how many leading items of a sequence sorted newest first are newer than the watermark.
+
+    This is a binary search, so only a logarithmic number of timestamps are looked at.
+    """
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        epoch = items[middle] if epoch_of is None else epoch_of(items[middle])
+        if epoch > watermark_us:
+            low = middle + 1
+        else:
+            high = middle
+    return low
@@ -0,0 +1,214 @@
+import asyncio
+import datetime
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import aiomysql
+import pytz
+
+import src.config as config
+from src.article import Article
+from src.scripts import migrations
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class AsyncDataBase:
+    def __init__(self, pool_size: int = config.DB_POOL_SIZE):
+        self.pool_size = pool_size
+        self._pool: Optional[aiomysql.Pool] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+        self._articles_migrated = False
+        self._checkpoint_table_created = False
+        self._lease_table_created = False
+
+    async def _get_pool(self) -> aiomysql.Pool:
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(user=config.DB_USER, password=config.DB_PASS,
+                                                            host=config.DB_HOST, port=config.DB_PORT,
+                                                            db=config.DB_NAME, maxsize=self.pool_size)
+        return self._pool
+
+    async def add_article(self, article: Article) -> int:
+        return (await self.add_articles([article]))[0]
+
+    async def add_articles(self, articles: List[Article]) -> List[int]:
+        if not articles:
+            return []
+        logger.info(f"Adding {len(articles)} articles to database.")
+        items = tuple(item for article in articles for item in article.row())
+        urls = tuple(article.url for article in articles)
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._migrate_articles(cursor)
+                await cursor.execute("INSERT INTO articles (url, time, origin, title, section, source_id) "
+                                     f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(articles))} "
+                                     "ON DUPLICATE KEY UPDATE id = id", items)
+                await connection.commit()
+                await cursor.execute(f"SELECT id, url FROM articles WHERE url IN ({', '.join(['%s'] * len(urls))})",
+                                     urls)
+                ids = {url: article_id for article_id, url in await cursor.fetchall()}
+        return [ids[url] for url in urls]
+
+    async def _migrate_articles(self, cursor: aiomysql.Cursor) -> None:
+        if self._articles_migrated:
+            return
+        # Replicas starting together take turns, so only the first one applies the migrations.
+        await cursor.execute("SELECT GET_LOCK(%s, %s)", (migrations.MYSQL_LOCK, migrations.MYSQL_LOCK_TIMEOUT))
+        try:
+            migration = migrations.mysql_migration()
+            statement = migrations.next_statement(migration, None)
+            while statement is not None:
+                await cursor.execute(*statement)
+                statement = migrations.next_statement(migration, list(await cursor.fetchall()))
+        finally:
+            await cursor.execute("SELECT RELEASE_LOCK(%s)", (migrations.MYSQL_LOCK,))
+        self._articles_migrated = True
+
+    async def _create_checkpoint_table(self, cursor: aiomysql.Cursor) -> None:
+        if not self._checkpoint_table_created:
+            await cursor.execute("CREATE TABLE IF NOT EXISTS checkpoints ("
+                                 "source VARCHAR(255) PRIMARY KEY, "
+                                 "time DATETIME(6) NOT NULL, "
+                                 "last_id TEXT)")
+            self._checkpoint_table_created = True
+
+    async def load_checkpoint(self, source: str) -> Optional[Tuple[datetime.datetime, Optional[str]]]:
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._create_checkpoint_table(cursor)
+                await cursor.execute("SELECT time, last_id FROM checkpoints WHERE source = %s", (source,))
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return row[0].replace(tzinfo=pytz.utc), row[1]
+
+    async def save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str] = None) -> None:
+        items = (source, time.astimezone(pytz.utc).replace(tzinfo=None), last_id)
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._create_checkpoint_table(cursor)
+                await cursor.execute("INSERT INTO checkpoints (source, time, last_id) VALUES (%s, %s, %s) "
+                                     "ON DUPLICATE KEY UPDATE time = VALUES(time), last_id = VALUES(last_id)", items)
+                await connection.commit()
+
+    async def _create_lease_table(self, cursor: aiomysql.Cursor) -> None:
+        if not self._lease_table_created:
+            await cursor.execute("CREATE TABLE IF NOT EXISTS leases ("
+                                 "name VARCHAR(255) PRIMARY KEY, "
+                                 "owner VARCHAR(255) NOT NULL, "
+                                 "expires_at DATETIME(6) NOT NULL)")
+            self._lease_table_created = True
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        ttl_us = int(ttl * 1e6)
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._create_lease_table(cursor)
+                # Expiry is compared against the database clock, so replicas with skewed clocks still agree. MySQL
+                # applies the assignments in order, so expires_at is only extended if owner now is the caller.
+                await cursor.execute("INSERT INTO leases (name, owner, expires_at) "
+                                     "VALUES (%s, %s, NOW(6) + INTERVAL %s MICROSECOND) "
+                                     "ON DUPLICATE KEY UPDATE "
+                                     "owner = IF(owner = VALUES(owner) OR expires_at < NOW(6), VALUES(owner), owner), "
+                                     "expires_at = IF(owner = VALUES(owner), VALUES(expires_at), expires_at)",
+                                     (name, owner, ttl_us))
+                await connection.commit()
+                await cursor.execute("SELECT owner FROM leases WHERE name = %s", (name,))
+                row = await cursor.fetchone()
+        return row is not None and row[0] == owner
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await self._create_lease_table(cursor)
+                await cursor.execute("DELETE FROM leases WHERE name = %s AND owner = %s", (name, owner))
+                await connection.commit()
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+
+class AsyncArticleBuffer:
+    def __init__(self, db, on_flush: Callable[[List[int]], Awaitable[None]],
+                 flush_size: int = config.DB_FLUSH_SIZE, flush_interval: float = config.DB_FLUSH_INTERVAL):
+        self.db = db
+        self.on_flush = on_flush
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.failed_flushes = 0
+        self._articles: List[Article] = []
+        self._commits: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def add(self, articles: List[Article]) -> asyncio.Future:
+        """Buffers the articles and returns a future that is done once they are committed to the database.
+
+        A failed flush keeps its articles buffered and retries them after flush_interval, so the future only ever
+        completes successfully.
+        """
+        commit = asyncio.get_event_loop().create_future()
+        if not articles:
+            commit.set_result(None)
+            return commit
+        self._articles.extend(articles)
+        self._commits.append(commit)
+        if len(self._articles) >= self.flush_size:
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Exception occurred while flushing articles to the database, will retry")
+        else:
+            self._schedule()
+        return commit
+
+    def _schedule(self) -> None:
+        if self._articles and self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Exception occurred while flushing articles to the database, will retry")
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        articles, self._articles = self._articles, []
+        commits, self._commits = self._commits, []
+        if not articles:
+            return
+        try:
+            ids = await self.db.add_articles(articles)
+        except Exception:
+            self.failed_flushes += 1
+            articles.extend(self._articles)
+            self._articles = articles
+            self._commits = commits + self._commits
+            self._schedule()
+            raise
+        for commit in commits:
+            if not commit.done():
+                commit.set_result(None)
+        await self.on_flush(ids)
+
+    async def close(self) -> None:
+        await self.flush()
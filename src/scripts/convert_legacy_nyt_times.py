@@ -0,0 +1,79 @@
+"""Converts NYT article times that MySQL stored as New York wall times to UTC.
+
+Before times were normalised to UTC, MySQL stored the wall time of each article's own offset. CNBC and Guardian
+times were UTC already and Newswire times were New York time. The offset itself was not stored, so NYT archive
+times, which were UTC and only fetched while catching up, cannot be told apart and are shifted as well. The change
+cannot be undone, so it is not part of the schema migrations and only runs when asked to, once per database:
+
+    python -m src.scripts.convert_legacy_nyt_times --through-id <id of the last article stored before the upgrade>
+"""
+import argparse
+import datetime
+import logging
+from typing import List, Tuple
+
+import mysql.connector as mysql
+import pytz
+
+from src.scripts.database import DataBase
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+NAME = "legacy_nyt_times_to_utc"
+BATCH_SIZE = 1000
+LEGACY_TIME_ZONE = pytz.timezone("America/New_York")
+SELECT_LEGACY_TIMES = ("SELECT id, time FROM articles WHERE origin = 'n' AND time IS NOT NULL AND id > %s AND id <= %s "
+                       "ORDER BY id LIMIT %s")
+
+
+def legacy_times_to_utc(rows: List[Tuple[int, datetime.datetime]]) -> List[Tuple[datetime.datetime, int]]:
+    return [(LEGACY_TIME_ZONE.localize(time).astimezone(pytz.utc).replace(tzinfo=None), article_id)
+            for article_id, time in rows]
+
+
+def convert(connection: mysql.MySQLConnection, through_id: int, dry_run: bool = False) -> int:
+    """Converts the NYT times of articles up to through_id and returns how many there were."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("CREATE TABLE IF NOT EXISTS data_migrations (name VARCHAR(255) PRIMARY KEY)")
+        cursor.execute("SELECT name FROM data_migrations WHERE name = %s", (NAME,))
+        if cursor.fetchall():
+            raise RuntimeError("NYT times were converted already, converting them again would shift them twice.")
+        converted = 0
+        last_id = 0
+        while True:
+            cursor.execute(SELECT_LEGACY_TIMES, (last_id, through_id, BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            if not dry_run:
+                cursor.executemany("UPDATE articles SET time = %s WHERE id = %s", legacy_times_to_utc(rows))
+            converted += len(rows)
+            last_id = rows[-1][0]
+        if not dry_run:
+            # Recorded in the same transaction as the updates, so the conversion either happened once or not at all.
+            cursor.execute("INSERT INTO data_migrations (name) VALUES (%s)", (NAME,))
+            connection.commit()
+        return converted
+    finally:
+        cursor.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--through-id", type=int, required=True,
+                        help="id of the last article stored before times were normalised to UTC")
+    parser.add_argument("--dry-run", action="store_true", help="only count the articles that would be converted")
+    args = parser.parse_args()
+    connection = DataBase()._create_connection()
+    try:
+        converted = convert(connection, args.through_id, args.dry_run)
+    finally:
+        connection.close()
+    logger.info(f"{'Would convert' if args.dry_run else 'Converted'} the times of {converted} NYT articles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import mysql.connector as mysql
+from mysql.connector import pooling
 import logging
-from typing import Optional, Tuple, Union, List, Any
+import threading
+from concurrent.futures import Future
+from typing import Optional, List, Callable
 
 import src.config as config
 from src.article import Article
+from src.scripts import migrations
 
 
 logger = logging.getLogger(__name__)
@@ -11,24 +15,48 @@ logger.setLevel(config.LOGGING_LEVEL)
 
 
 class DataBase:
+    def __init__(self, pool_size: int = config.DB_POOL_SIZE):
+        self.pool_size = pool_size
+        self._pool: Optional[pooling.MySQLConnectionPool] = None
+        self._articles_migrated = False
+
+    def _get_pool(self) -> pooling.MySQLConnectionPool:
+        if self._pool is None:
+            self._pool = pooling.MySQLConnectionPool(pool_name="news_fetcher", pool_size=self.pool_size,
+                                                     user=config.DB_USER, password=config.DB_PASS,
+                                                     host=config.DB_HOST, port=config.DB_PORT,
+                                                     database=config.DB_NAME)
+        return self._pool
+
     def _create_connection(self) -> mysql.MySQLConnection:
         try:
-            return mysql.connect(user=config.DB_USER, password=config.DB_PASS,
-                                 host=config.DB_HOST, port=config.DB_PORT, database=config.DB_NAME)
+            return self._get_pool().get_connection()
         except mysql.errors.DatabaseError as err:
             logger.error(f"Database error: {err}")
             return self._create_connection()
 
-    def _execute_sql(self, sql: str, items: Optional[Tuple] = None) -> None:
-        if items is None:
-            items = ()
+    def add_article(self, article: Article) -> int:
+        return self.add_articles([article])[0]
+
+    def add_articles(self, articles: List[Article]) -> List[int]:
+        if not articles:
+            return []
+        logger.info(f"Adding {len(articles)} articles to database.")
+        items = tuple(item for article in articles for item in article.row())
+        urls = tuple(article.url for article in articles)
         connection = None
         cursor = None
         try:
             connection = self._create_connection()
+            self._migrate_articles(connection)
             cursor = connection.cursor(prepared=True)
-            cursor.execute(sql, items)
+            cursor.execute("INSERT INTO articles (url, time, origin, title, section, source_id) "
+                           f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(articles))} "
+                           "ON DUPLICATE KEY UPDATE id = id", items)
             connection.commit()
+            cursor.execute(f"SELECT id, url FROM articles WHERE url IN ({', '.join(['%s'] * len(urls))})", urls)
+            ids = {url: article_id for article_id, url in cursor.fetchall()}
+            return [ids[url] for url in urls]
         finally:
             if connection is not None:
                 if connection.is_connected():
@@ -36,37 +64,95 @@ class DataBase:
                         cursor.close()
                     connection.close()
 
-    def _retrieve_sql(self,
-                      sql: str,
-                      items: Optional[Tuple] = None,
-                      fetch_all: bool = False) -> Optional[Union[List, Any]]:
-        if items is None:
-            items = ()
-        connection = None
-        cursor = None
+    def _migrate_articles(self, connection: mysql.MySQLConnection) -> None:
+        if self._articles_migrated:
+            return
+        cursor = connection.cursor()
+        # Replicas starting together take turns, so only the first one applies the migrations.
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (migrations.MYSQL_LOCK, migrations.MYSQL_LOCK_TIMEOUT))
+        cursor.fetchall()
         try:
-            connection = self._create_connection()
-            cursor = connection.cursor(prepared=True)
-            cursor.execute(sql, items)
-            if fetch_all:
-                result = cursor.fetchall()
-            else:
-                result = cursor.fetchone()
-            return result
-        except mysql.Error as error:
-            logger.error(f"Error while retrieving from database: {error}")
+            migration = migrations.mysql_migration()
+            statement = migrations.next_statement(migration, None)
+            while statement is not None:
+                cursor.execute(*statement)
+                statement = migrations.next_statement(migration, cursor.fetchall() if cursor.with_rows else [])
         finally:
-            if connection is not None:
-                if connection.is_connected():
-                    if cursor is not None:
-                        cursor.close()
-                    connection.close()
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (migrations.MYSQL_LOCK,))
+            cursor.fetchall()
+            cursor.close()
+        self._articles_migrated = True
 
-    def add_article(self, article: Article) -> int:
-        logger.info(f"Adding article to database: {article.url} from {article.origin}")
-        items = (
-            article.url, article.time, article.origin
-        )
-        self._execute_sql("INSERT INTO articles (url, time, origin) "
-                          "VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE id = id", items)
-        return self._retrieve_sql("SELECT id FROM articles WHERE url = %s", (article.url,))[0]
+
+class ArticleBuffer:
+    def __init__(self, db: DataBase, on_flush: Callable[[List[int]], None],
+                 flush_size: int = config.DB_FLUSH_SIZE, flush_interval: float = config.DB_FLUSH_INTERVAL):
+        self.db = db
+        self.on_flush = on_flush
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.failed_flushes = 0
+        self._articles: List[Article] = []
+        self._commits: List[Future] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, articles: List[Article]) -> Future:
+        """Buffers the articles and returns a future that is done once they are committed to the database.
+
+        A failed flush keeps its articles buffered and retries them after flush_interval, so the future only ever
+        completes successfully.
+        """
+        commit = Future()
+        if not articles:
+            commit.set_result(None)
+            return commit
+        with self._lock:
+            self._articles.extend(articles)
+            self._commits.append(commit)
+            if len(self._articles) < self.flush_size:
+                self._schedule()
+                return commit
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Exception occurred while flushing articles to the database, will retry")
+        return commit
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._articles:
+            self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Exception occurred while flushing articles to the database, will retry")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            articles, self._articles = self._articles, []
+            commits, self._commits = self._commits, []
+        if not articles:
+            return
+        try:
+            ids = self.db.add_articles(articles)
+        except Exception:
+            with self._lock:
+                self.failed_flushes += 1
+                articles.extend(self._articles)
+                self._articles = articles
+                self._commits = commits + self._commits
+                self._schedule()
+            raise
+        for commit in commits:
+            commit.set_result(None)
+        self.on_flush(ids)
+
+    def close(self) -> None:
+        self.flush()
@@ -1,15 +1,36 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from collections import defaultdict
 from google.cloud import pubsub_v1
 import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+import src.config as config
 from src.config import GCP_PROJECT
 
-publisher = pubsub_v1.PublisherClient()
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+_publisher: Optional[pubsub_v1.PublisherClient] = None
+
+
+def get_publisher() -> pubsub_v1.PublisherClient:
+    global _publisher
+    if _publisher is None:
+        batch_settings = pubsub_v1.types.BatchSettings(max_messages=config.PUBSUB_MAX_MESSAGES,
+                                                       max_bytes=config.PUBSUB_MAX_BYTES,
+                                                       max_latency=config.PUBSUB_MAX_LATENCY)
+        _publisher = pubsub_v1.PublisherClient(batch_settings)
+    return _publisher
 
 
 def publish_message(project_id: str, topic_id: str, msg: dict) -> None:
     """Publishes message to a Pub/Sub topic."""
     # [START pubsub_quickstart_publisher]
     # [START pubsub_publish]
+    publisher = get_publisher()
 
     # The `topic_path` method creates a fully qualified identifier
     # in the form `projects/{project_id}/topics/{topic_id}`
@@ -25,7 +46,78 @@ def publish_message(project_id: str, topic_id: str, msg: dict) -> None:
     # [END pubsub_publish]
 
 
+def new_news_article_url_event(article_id: int) -> dict:
+    return {"type": "scraped_url", "article_id": str(article_id)}
+
+
 def publish_event_new_news_article_url(article_id: int) -> None:
-    publish_message(GCP_PROJECT, "news", {
-        "type": "scraped_url",
-        "article_id": article_id})
+    publish_message(GCP_PROJECT, "news", new_news_article_url_event(article_id))
+
+
+class InMemoryPublisherClient:
+    """Local stand-in for pubsub_v1.PublisherClient that keeps published messages in memory."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.messages: Dict[str, List[Tuple[bytes, dict]]] = defaultdict(list)
+
+    @staticmethod
+    def topic_path(project_id: str, topic_id: str) -> str:
+        return f"projects/{project_id}/topics/{topic_id}"
+
+    def publish(self, topic: str, data: bytes, **attrs) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        if self.fail:
+            future.set_exception(RuntimeError("Publishing failed."))
+        else:
+            self.messages[topic].append((data, attrs))
+            future.set_result(str(len(self.messages[topic])))
+        return future
+
+    def stop(self) -> None:
+        pass
+
+
+class AsyncPublisher:
+    def __init__(self, client=None, project_id: str = GCP_PROJECT,
+                 on_failure: Optional[Callable[[dict, BaseException], None]] = None):
+        self.client = client if client is not None else get_publisher()
+        self.project_id = project_id
+        # on_failure runs on the client's callback thread, not on the event loop.
+        self.on_failure = on_failure
+        self.failures = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def publish(self, topic_id: str, msg: dict) -> None:
+        topic_path = self.client.topic_path(self.project_id, topic_id)
+        future = self.client.publish(topic_path, b"", **msg)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(functools.partial(self._on_done, msg))
+
+    def _on_done(self, msg: dict, future: concurrent.futures.Future) -> None:
+        exception = future.exception()
+        with self._lock:
+            self._pending.discard(future)
+            if exception is not None:
+                self.failures += 1
+        if exception is not None:
+            logger.error(f"Failed to publish message {msg}: {exception}")
+            if self.on_failure is not None:
+                self.on_failure(msg, exception)
+
+    def publish_events_new_news_article_url(self, article_ids: Iterable[int]) -> None:
+        for article_id in article_ids:
+            self.publish("news", new_news_article_url_event(article_id))
+
+    async def flush(self) -> None:
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            await asyncio.get_event_loop().run_in_executor(None, concurrent.futures.wait, pending)
+        logger.info(f"Flushed {len(pending)} pending messages.")
+
+    async def close(self) -> None:
+        await self.flush()
+        await asyncio.get_event_loop().run_in_executor(None, self.client.stop)
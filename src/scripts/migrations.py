@@ -0,0 +1,61 @@
+"""Schema changes of the articles table.
+
+MySQL records how many migrations it has applied in the schema_version table, SQLite in PRAGMA user_version. The
+missing ones are applied in order the first time articles are written.
+"""
+import logging
+from typing import Generator, Optional, Tuple
+
+import ciso8601
+import pytz
+
+import src.config as config
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+Statement = Tuple[str, tuple]
+
+MYSQL_LOCK = "news_fetcher_schema"
+MYSQL_LOCK_TIMEOUT = 60
+# Migration n brings the table from version n - 1 to version n.
+MYSQL_MIGRATIONS = (
+    "ALTER TABLE articles ADD COLUMN title TEXT, ADD COLUMN section VARCHAR(255), ADD COLUMN source_id VARCHAR(255)",
+)
+MYSQL_VERSION = len(MYSQL_MIGRATIONS)
+
+SQLITE_VERSION = 2
+SQLITE_ARTICLE_COLUMNS = ("title", "section", "source_id")
+
+
+def mysql_migration() -> Generator[Statement, list, None]:
+    """Yields the statements that bring the articles table up to date, the caller sends back the rows of each.
+
+    The blocking and the async MySQL store both run it with their own cursor, holding MYSQL_LOCK around it.
+    """
+    yield "CREATE TABLE IF NOT EXISTS schema_version (version INT NOT NULL)", ()
+    rows = yield "SELECT version FROM schema_version", ()
+    version = rows[0][0] if rows else 0
+    for number, statement in enumerate(MYSQL_MIGRATIONS[version:], version + 1):
+        yield statement, ()
+        yield "DELETE FROM schema_version", ()
+        yield "INSERT INTO schema_version (version) VALUES (%s)", (number,)
+        yield "COMMIT", ()
+    if version < MYSQL_VERSION:
+        logger.info(f"Migrated articles table from version {version} to {MYSQL_VERSION}.")
+
+
+def next_statement(migration: Generator[Statement, list, None], rows: Optional[list]) -> Optional[Statement]:
+    try:
+        return migration.send(rows)
+    except StopIteration:
+        return None
+
+
+def sqlite_time_to_utc(time: str) -> Optional[str]:
+    """SQLite kept the offset of each time, so times that are not UTC yet are converted exactly."""
+    parsed = ciso8601.parse_datetime(time)
+    if parsed.tzinfo is None:
+        return None
+    utc = parsed.astimezone(pytz.utc).isoformat()
+    return None if utc == time else utc
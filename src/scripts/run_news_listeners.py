@@ -1,20 +1,56 @@
+from src.listeners.checkpoints import FileCheckpointStore
+from src.listeners.leases import LeaseManager
 from src.listeners.news_listener import NewsListener
-from src.listeners.cnbc.cnbc import get_listener as cnbc_listener
-from src.listeners.guardian.guardian import get_listener as guardian_listener
-from src.scripts.gcloud_message_broker import publish_event_new_news_article_url
-from src.scripts.database import DataBase
+from src.listeners.pipeline import ArticlePipeline
+from src.listeners.registry import load_source_configs, load_sources
+from src.listeners.sharding import ShardSupervisor
+from src.scripts.gcloud_message_broker import AsyncPublisher
+from src.scripts.async_database import AsyncDataBase, AsyncArticleBuffer
+from src.scripts.sqlite_database import SQLiteDataBase
+import src.config as config
+
+
+def get_database():
+    if config.DB_BACKEND == "sqlite":
+        return SQLiteDataBase()
+    return AsyncDataBase()
+
+
+def get_checkpoints():
+    if config.CHECKPOINT_BACKEND == "file":
+        return FileCheckpointStore()
+    return get_database()
+
+
+def get_leases():
+    return LeaseManager(get_database())
 
 
 def main():
-    db = DataBase()
+    db = get_database()
+    publisher = AsyncPublisher()
 
-    def callback(article):
-        article_id = db.add_article(article)
-        publish_event_new_news_article_url(article_id)
+    async def publish(article_ids):
+        publisher.publish_events_new_news_article_url(article_ids)
 
-    news_listener = NewsListener()
-    news_listener.add_listener(cnbc_listener(callback))
-    news_listener.add_listener(guardian_listener(callback))
+    article_buffer = AsyncArticleBuffer(db, publish)
+    pipeline = ArticlePipeline([article_buffer.add])
+    checkpoints = FileCheckpointStore() if config.CHECKPOINT_BACKEND == "file" else db
+    if config.LISTENER_PROCESSES > 1:
+        news_listener = NewsListener(pipeline, checkpoints)
+        supervisor = ShardSupervisor(load_source_configs(), config.LISTENER_PROCESSES, pipeline.put, checkpoints,
+                                     get_checkpoints, get_leases if config.LEASES else None)
+        news_listener.add_listener(supervisor.run)
+        checkpoint_owner = supervisor
+    else:
+        news_listener = NewsListener(pipeline, checkpoints, leases=LeaseManager(db) if config.LEASES else None)
+        for source in load_sources():
+            news_listener.add_source(source)
+        checkpoint_owner = news_listener
+    news_listener.add_shutdown_callback(article_buffer.close)
+    news_listener.add_shutdown_callback(checkpoint_owner.wait_for_checkpoints)
+    news_listener.add_shutdown_callback(db.close)
+    news_listener.add_shutdown_callback(publisher.close)
     news_listener.start_listeners()
 
 
@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import ciso8601
+
+import src.config as config
+from src.article import Article
+from src.scripts import migrations
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(config.LOGGING_LEVEL)
+
+
+class SQLiteDataBase:
+    def __init__(self, path: str = config.SQLITE_PATH):
+        self.path = path
+        # sqlite3 connections must not be used from two threads at once, so every call goes through one thread.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            if self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles'"
+                                        ).fetchone() is None:
+                self._connection.execute("CREATE TABLE articles ("
+                                         "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                         "url TEXT NOT NULL UNIQUE, "
+                                         "time TEXT, "
+                                         "origin TEXT, "
+                                         "title TEXT, "
+                                         "section TEXT, "
+                                         "source_id TEXT)")
+                self._connection.execute(f"PRAGMA user_version = {migrations.SQLITE_VERSION}")
+            else:
+                self._migrate(self._connection)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS checkpoints ("
+                                     "source TEXT PRIMARY KEY, "
+                                     "time TEXT NOT NULL, "
+                                     "last_id TEXT)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS leases ("
+                                     "name TEXT PRIMARY KEY, "
+                                     "owner TEXT NOT NULL, "
+                                     "expires_at REAL NOT NULL)")
+        return self._connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            with connection:
+                for column in migrations.SQLITE_ARTICLE_COLUMNS:
+                    connection.execute(f"ALTER TABLE articles ADD COLUMN {column} TEXT")
+                connection.execute("PRAGMA user_version = 1")
+        if version < 2:
+            updates = []
+            for article_id, stored in connection.execute("SELECT id, time FROM articles WHERE time IS NOT NULL"):
+                utc = migrations.sqlite_time_to_utc(stored)
+                if utc is not None:
+                    updates.append((utc, article_id))
+            with connection:
+                connection.executemany("UPDATE articles SET time = ? WHERE id = ?", updates)
+                connection.execute("PRAGMA user_version = 2")
+        if version < migrations.SQLITE_VERSION:
+            logger.info(f"Migrated articles table from version {version} to {migrations.SQLITE_VERSION}.")
+
+    def _add_articles(self, articles: List[Article]) -> List[int]:
+        items = [(url, None if time is None else time.isoformat(), *rest)
+                 for url, time, *rest in (article.row() for article in articles)]
+        urls = [article.url for article in articles]
+        connection = self._get_connection()
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO articles (url, time, origin, title, section, source_id) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", items)
+            rows = connection.execute(f"SELECT id, url FROM articles WHERE url IN ({', '.join(['?'] * len(urls))})",
+                                      urls).fetchall()
+        ids = {url: article_id for article_id, url in rows}
+        return [ids[url] for url in urls]
+
+    def _load_checkpoint(self, source: str) -> Optional[Tuple[datetime.datetime, Optional[str]]]:
+        row = self._get_connection().execute("SELECT time, last_id FROM checkpoints WHERE source = ?",
+                                             (source,)).fetchone()
+        if row is None:
+            return None
+        return ciso8601.parse_datetime(row[0]), row[1]
+
+    def _save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str]) -> None:
+        connection = self._get_connection()
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO checkpoints (source, time, last_id) VALUES (?, ?, ?)",
+                               (source, time.isoformat(), last_id))
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        connection = self._get_connection()
+        with connection:
+            connection.execute("INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                               "ON CONFLICT (name) DO UPDATE SET "
+                               "owner = excluded.owner, expires_at = excluded.expires_at "
+                               "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                               (name, owner, now + ttl, now))
+            row = connection.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def _release_lease(self, name: str, owner: str) -> None:
+        connection = self._get_connection()
+        with connection:
+            connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def add_article(self, article: Article) -> int:
+        return (await self.add_articles([article]))[0]
+
+    async def add_articles(self, articles: List[Article]) -> List[int]:
+        if not articles:
+            return []
+        logger.info(f"Adding {len(articles)} articles to database.")
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self._add_articles, articles)
+
+    async def load_checkpoint(self, source: str) -> Optional[Tuple[datetime.datetime, Optional[str]]]:
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self._load_checkpoint, source)
+
+    async def save_checkpoint(self, source: str, time: datetime.datetime, last_id: Optional[str] = None) -> None:
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._save_checkpoint, source, time, last_id)
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self._acquire_lease, name, owner, ttl)
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._release_lease, name, owner)
+
+    async def close(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=True)
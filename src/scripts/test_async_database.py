@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytz
+
+from src.article import Article
+from src.scripts import migrations
+from src.scripts.async_database import AsyncArticleBuffer, AsyncDataBase
+
+
+# Required environment variables: None
+def mock_pool(fetchall=(), fetchone=None):
+    cursor = MagicMock()
+    cursor.execute = AsyncMock()
+    cursor.executemany = AsyncMock()
+    cursor.fetchall = AsyncMock(return_value=list(fetchall))
+    cursor.fetchone = AsyncMock(return_value=fetchone)
+    connection = MagicMock()
+    connection.commit = AsyncMock()
+    connection.cursor.return_value.__aenter__.return_value = cursor
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = connection
+    pool.wait_closed = AsyncMock()
+    return pool, connection, cursor
+
+
+def executed(cursor, prefix):
+    return [call.args for call in cursor.execute.await_args_list if call.args[0].startswith(prefix)]
+
+
+class AsyncDataBaseTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_add_articles_inserts_one_statement_and_returns_ids_in_input_order(self):
+        pool, connection, cursor = mock_pool(fetchall=[(7, "b"), (3, "a")], fetchone=(migrations.MYSQL_VERSION,))
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        with patch("aiomysql.create_pool", AsyncMock(return_value=pool)) as create_pool:
+            db = AsyncDataBase()
+            ids = await db.add_articles([Article("a", time, "c", title="A", section="world", source_id="1"),
+                                         Article("b", None, "g")])
+            await db.close()
+
+        create_pool.assert_awaited_once()
+        insert, items = executed(cursor, "INSERT INTO articles")[0]
+        self.assertEqual(insert.count("(%s, %s, %s, %s, %s, %s)"), 2)
+        self.assertEqual(items, ("a", time, "c", "A", "world", "1", "b", None, "g", None, None, None))
+        connection.commit.assert_awaited_once()
+        self.assertEqual(ids, [3, 7])
+        pool.close.assert_called_once()
+
+    async def test_pool_is_created_once_for_concurrent_calls(self):
+        pool, _, _ = mock_pool(fetchall=[(1, "a")], fetchone=(migrations.MYSQL_VERSION,))
+        with patch("aiomysql.create_pool", AsyncMock(return_value=pool)) as create_pool:
+            db = AsyncDataBase()
+            await asyncio.gather(db.add_article(Article("a", None, "c")), db.add_article(Article("a", None, "c")))
+
+        create_pool.assert_awaited_once()
+
+    async def test_migrates_articles_table_once(self):
+        pool, _, cursor = mock_pool(fetchall=[(1, "a")])
+        # The version query finds no version, the statements of the migrations return no rows.
+        cursor.fetchall.side_effect = [[], [], [], [], [], [], [(1, "a")], [(1, "a")]]
+        with patch("aiomysql.create_pool", AsyncMock(return_value=pool)):
+            db = AsyncDataBase()
+            await db.add_article(Article("a", None, "n"))
+            await db.add_article(Article("a", None, "n"))
+
+        self.assertEqual(len(executed(cursor, "ALTER TABLE articles")), 1)
+        self.assertEqual(executed(cursor, "INSERT INTO schema_version")[-1][1], (migrations.MYSQL_VERSION,))
+        self.assertEqual(len(executed(cursor, "SELECT RELEASE_LOCK")), 1)
+        cursor.executemany.assert_not_awaited()
+
+    async def test_load_checkpoint_returns_utc_time(self):
+        pool, _, _ = mock_pool(fetchone=(datetime.datetime(2023, 1, 1, 12), "a"))
+        with patch("aiomysql.create_pool", AsyncMock(return_value=pool)):
+            checkpoint = await AsyncDataBase().load_checkpoint("cnbc")
+
+        self.assertEqual(checkpoint, (datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc), "a"))
+
+    async def test_acquire_lease_reports_whether_caller_owns_it(self):
+        pool, _, cursor = mock_pool(fetchone=("other",))
+        with patch("aiomysql.create_pool", AsyncMock(return_value=pool)):
+            db = AsyncDataBase()
+            self.assertFalse(await db.acquire_lease("cnbc", "me", 60))
+            cursor.fetchone.return_value = ("me",)
+            self.assertTrue(await db.acquire_lease("cnbc", "me", 60))
+
+
+class FakeAsyncDataBase:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    async def add_articles(self, articles):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError()
+        self.batches.append([article.url for article in articles])
+        return list(range(len(articles)))
+
+
+class AsyncArticleBufferTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_flush_keeps_articles_until_committed(self):
+        db = FakeAsyncDataBase(failures=1)
+        article_buffer = AsyncArticleBuffer(db, AsyncMock(), flush_size=1, flush_interval=60)
+
+        commit = await article_buffer.add([Article("a", None, "c")])
+        self.assertFalse(commit.done())
+        await article_buffer.close()
+
+        self.assertTrue(commit.done())
+        self.assertEqual(db.batches, [["a"]])
+        self.assertEqual(article_buffer.failed_flushes, 1)
+
+    async def test_failed_background_flush_is_retried(self):
+        db = FakeAsyncDataBase(failures=1)
+        article_buffer = AsyncArticleBuffer(db, AsyncMock(), flush_size=10, flush_interval=0.01)
+
+        first = await article_buffer.add([Article("a", None, "c")])
+        second = await article_buffer.add([Article("b", None, "c")])
+        await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+        self.assertEqual(db.batches, [["a", "b"]])
+        self.assertEqual(article_buffer.failed_flushes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock
+
+from src.scripts.convert_legacy_nyt_times import convert
+
+
+# Required environment variables: None
+def mock_connection(*fetchall):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value
+    cursor.fetchall.side_effect = list(fetchall)
+    return connection, cursor
+
+
+class ConvertTestCase(unittest.TestCase):
+    def test_converts_new_york_times_to_utc_and_records_it(self):
+        connection, cursor = mock_connection([], [(1, datetime.datetime(2023, 1, 1, 7)),
+                                                  (2, datetime.datetime(2023, 7, 1, 8))], [])
+
+        converted = convert(connection, through_id=2)
+
+        self.assertEqual(converted, 2)
+        self.assertEqual(cursor.executemany.call_args.args[1], [(datetime.datetime(2023, 1, 1, 12), 1),
+                                                                (datetime.datetime(2023, 7, 1, 12), 2)])
+        self.assertEqual(cursor.execute.call_args.args[1], ("legacy_nyt_times_to_utc",))
+        connection.commit.assert_called_once()
+
+    def test_refuses_to_convert_twice(self):
+        connection, cursor = mock_connection([("legacy_nyt_times_to_utc",)])
+
+        with self.assertRaises(RuntimeError):
+            convert(connection, through_id=2)
+
+        cursor.executemany.assert_not_called()
+        connection.commit.assert_not_called()
+
+    def test_dry_run_changes_nothing(self):
+        connection, cursor = mock_connection([], [(1, datetime.datetime(2023, 1, 1, 7))], [])
+
+        self.assertEqual(convert(connection, through_id=1, dry_run=True), 1)
+
+        cursor.executemany.assert_not_called()
+        connection.commit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+from src.article import Article
+from src.scripts.database import ArticleBuffer
+
+
+# Required environment variables: None
+class FakeDataBase:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def add_articles(self, articles):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError()
+        self.batches.append([article.url for article in articles])
+        return list(range(len(articles)))
+
+
+class ArticleBufferTestCase(unittest.TestCase):
+    def test_flushes_when_flush_size_is_reached(self):
+        db = FakeDataBase()
+        flushed = []
+        article_buffer = ArticleBuffer(db, flushed.append, flush_size=3, flush_interval=60)
+
+        article_buffer.add([Article("a", None, "c"), Article("b", None, "c")])
+        self.assertEqual(db.batches, [])
+        article_buffer.add([Article("c", None, "c")])
+
+        self.assertEqual(db.batches, [["a", "b", "c"]])
+        self.assertEqual(flushed, [[0, 1, 2]])
+
+    def test_flushes_after_flush_interval(self):
+        flushed = threading.Event()
+        db = FakeDataBase()
+        article_buffer = ArticleBuffer(db, lambda ids: flushed.set(), flush_size=10, flush_interval=0.05)
+
+        article_buffer.add([Article("a", None, "c")])
+
+        self.assertTrue(flushed.wait(1))
+        self.assertEqual(db.batches, [["a"]])
+
+    def test_close_flushes_remaining_articles(self):
+        db = FakeDataBase()
+        article_buffer = ArticleBuffer(db, lambda ids: None, flush_size=10, flush_interval=60)
+        article_buffer.add([Article("a", None, "c")])
+
+        article_buffer.close()
+
+        self.assertEqual(db.batches, [["a"]])
+
+    def test_failed_flush_keeps_articles_until_committed(self):
+        db = FakeDataBase(failures=1)
+        article_buffer = ArticleBuffer(db, lambda ids: None, flush_size=1, flush_interval=60)
+
+        commit = article_buffer.add([Article("a", None, "c")])
+        self.assertFalse(commit.done())
+        article_buffer.close()
+
+        self.assertTrue(commit.done())
+        self.assertEqual(db.batches, [["a"]])
+        self.assertEqual(article_buffer.failed_flushes, 1)
+
+    def test_failed_timer_flush_is_retried(self):
+        db = FakeDataBase(failures=1)
+        article_buffer = ArticleBuffer(db, lambda ids: None, flush_size=10, flush_interval=0.05)
+
+        commit = article_buffer.add([Article("a", None, "c")])
+        commit.result(timeout=1)
+
+        self.assertEqual(db.batches, [["a"]])
+        self.assertEqual(article_buffer.failed_flushes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from src.scripts.gcloud_message_broker import AsyncPublisher, InMemoryPublisherClient
+
+
+# Required environment variables: None
+class AsyncPublisherTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_publishes_article_events(self):
+        client = InMemoryPublisherClient()
+        publisher = AsyncPublisher(client, project_id="project")
+
+        publisher.publish_events_new_news_article_url([1, 2])
+        await publisher.close()
+
+        messages = client.messages["projects/project/topics/news"]
+        self.assertEqual([attrs["article_id"] for _, attrs in messages], ["1", "2"])
+        self.assertEqual(publisher.failures, 0)
+
+    async def test_reports_failures_through_callback(self):
+        failed = []
+        publisher = AsyncPublisher(InMemoryPublisherClient(fail=True), project_id="project",
+                                   on_failure=lambda msg, exception: failed.append(msg))
+
+        publisher.publish_events_new_news_article_url([1])
+        await publisher.flush()
+
+        self.assertEqual(publisher.failures, 1)
+        self.assertEqual(failed, [{"type": "scraped_url", "article_id": "1"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pytz
+
+from src.article import Article
+from src.scripts import migrations
+from src.scripts.async_database import AsyncArticleBuffer
+from src.scripts.sqlite_database import SQLiteDataBase
+
+
+# Required environment variables: None
+class SQLiteDataBaseTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = SQLiteDataBase(os.path.join(self.directory.name, "articles.sqlite3"))
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.directory.cleanup()
+
+    async def test_returns_ids_in_input_order(self):
+        time = datetime.datetime(2023, 1, 1, tzinfo=pytz.utc)
+        ids = await self.db.add_articles([Article("a", time, "c"), Article("b", time, "g")])
+
+        self.assertEqual(len(set(ids)), 2)
+        self.assertEqual(await self.db.add_article(Article("b", time, "g")), ids[1])
+
+    async def test_duplicate_urls_keep_their_id(self):
+        first = await self.db.add_article(Article("a", None, "c"))
+        ids = await self.db.add_articles([Article("b", None, "c"), Article("a", None, "c")])
+
+        self.assertEqual(ids[1], first)
+
+    async def test_stores_article_metadata(self):
+        time = datetime.datetime(2023, 1, 1, 7, tzinfo=pytz.FixedOffset(-300))
+        await self.db.add_article(Article("a", time, "n", title="A", section="world", source_id="1"))
+
+        row = self.db._get_connection().execute("SELECT time, origin, title, section, source_id FROM articles"
+                                                ).fetchone()
+
+        self.assertEqual(row, ("2023-01-01T12:00:00+00:00", "n", "A", "world", "1"))
+
+    async def test_checkpoints_round_trip(self):
+        time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+        self.assertIsNone(await self.db.load_checkpoint("cnbc"))
+
+        await self.db.save_checkpoint("cnbc", time, "a")
+        await self.db.save_checkpoint("cnbc", time + datetime.timedelta(hours=1), "b")
+
+        self.assertEqual(await self.db.load_checkpoint("cnbc"), (time + datetime.timedelta(hours=1), "b"))
+
+    async def test_lease_is_held_by_one_owner_until_it_expires(self):
+        self.assertTrue(await self.db.acquire_lease("cnbc", "first", 60))
+        self.assertFalse(await self.db.acquire_lease("cnbc", "second", 60))
+        self.assertTrue(await self.db.acquire_lease("cnbc", "first", 0))
+
+        self.assertTrue(await self.db.acquire_lease("cnbc", "second", 60))
+        self.assertFalse(await self.db.acquire_lease("cnbc", "first", 60))
+
+    async def test_released_lease_is_free(self):
+        await self.db.acquire_lease("cnbc", "first", 60)
+        await self.db.release_lease("cnbc", "second")
+        self.assertFalse(await self.db.acquire_lease("cnbc", "second", 60))
+
+        await self.db.release_lease("cnbc", "first")
+
+        self.assertTrue(await self.db.acquire_lease("cnbc", "second", 60))
+
+    async def test_buffer_flushes_into_database(self):
+        flushed = []
+
+        async def on_flush(article_ids):
+            flushed.extend(article_ids)
+
+        article_buffer = AsyncArticleBuffer(self.db, on_flush, flush_size=2, flush_interval=60)
+        await article_buffer.add([Article("a", None, "c")])
+        self.assertEqual(flushed, [])
+        await article_buffer.add([Article("b", None, "c")])
+
+        self.assertEqual(len(flushed), 2)
+
+
+class SQLiteMigrationTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_adds_columns_and_converts_times_to_utc(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "articles.sqlite3")
+            connection = sqlite3.connect(path)
+            with connection:
+                connection.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                   "url TEXT NOT NULL UNIQUE, time TEXT, origin TEXT)")
+                connection.execute("INSERT INTO articles (url, time, origin) VALUES "
+                                   "('a', '2023-01-01T07:00:00-05:00', 'n'), ('b', '2023-01-01T12:00:00+00:00', 'g'), "
+                                   "('c', NULL, 'c')")
+            connection.close()
+
+            db = SQLiteDataBase(path)
+            await db.add_article(Article("d", None, "c", title="D"))
+            rows = db._get_connection().execute("SELECT url, time, title FROM articles ORDER BY id").fetchall()
+            version = db._get_connection().execute("PRAGMA user_version").fetchone()[0]
+            await db.close()
+
+        self.assertEqual(rows, [("a", "2023-01-01T12:00:00+00:00", None), ("b", "2023-01-01T12:00:00+00:00", None),
+                                ("c", None, None), ("d", None, "D")])
+        self.assertEqual(version, migrations.SQLITE_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import datetime
+import pickle
+import unittest
+
+import pytz
+
+from src.article import Article
+
+
+class ArticleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.time = datetime.datetime(2023, 1, 1, 12, tzinfo=pytz.utc)
+
+    def test_is_immutable(self):
+        article = Article("a", self.time, "c")
+
+        with self.assertRaises(AttributeError):
+            article.url = "b"
+        with self.assertRaises(AttributeError):
+            article.extra = "b"
+
+    def test_equal_articles_deduplicate_in_sets(self):
+        articles = {Article("a", self.time, "c", title="A"), Article("a", self.time, "c", title="A"),
+                    Article("a", self.time, "c")}
+
+        self.assertEqual(len(articles), 2)
+
+    def test_replace_and_pickle_keep_all_fields(self):
+        article = Article("a", self.time, "c", title="A", section="world", source_id="1")
+
+        self.assertEqual(article.replace(url="b").url, "b")
+        self.assertEqual(article.replace(url="b").source_id, "1")
+        self.assertEqual(pickle.loads(pickle.dumps(article)), article)
+
+    def test_row_holds_time_in_utc(self):
+        article = Article("a", datetime.datetime(2023, 1, 1, 7, tzinfo=pytz.FixedOffset(-300)), "n", title="A")
+
+        self.assertEqual(article.row(), ("a", self.time, "n", "A", None, None))
+        self.assertEqual(Article("b", None, "c").row(), ("b", None, "c", None, None, None))
+
+    def test_repr_shows_all_fields(self):
+        article = Article("a", self.time, "c", title="A", section="world", source_id="1")
+
+        self.assertIn("title='A'", repr(article))
+        self.assertIn("section='world'", repr(article))
+        self.assertIn("source_id='1'", repr(article))
+
+
+if __name__ == "__main__":
+    unittest.main()